@@ -46,6 +46,7 @@ bl_addon_info = {
 
 import os
 import sys
+from .pymeshio import common
 from .pymeshio.mqo import reader
 
 # for 2.5
@@ -585,9 +586,10 @@ def create_bone_weight(scene, mqo, armature_object, objects):
 
 def _execute(filepath='', scale=0.1):
     # read mqo model
-    model=reader.read_from_file(filepath)
-    if not model:
-        bl.message("fail to load %s" % filepath)
+    try:
+        model=reader.read_from_file(filepath)
+    except common.ParseException as ex:
+        bl.message("fail to load %s: %s" % (filepath, ex))
         return
 
     # create materials
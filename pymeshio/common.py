@@ -6,6 +6,14 @@ import math
 import struct
 import sys
 import io
+import mmap
+import array
+import contextlib
+try:
+    import numpy
+except ImportError:
+    # optional. required by Quaternion matrices and the array modes.
+    numpy=None
 
 
 def unicode(src):
@@ -316,6 +324,42 @@ def readall(path):
         return f.read()
 
 
+@contextlib.contextmanager
+def open_mapped(path):
+    """map the file to memory(read only) while in the with block
+
+    >>> with open_mapped(path) as buf:
+    ...     reader=BufferReader(buf)
+    """
+    with open(path, "rb") as f:
+        m=mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield m
+    finally:
+        try:
+            m.close()
+        except BufferError:
+            # a memoryview is still alive(in a traceback).
+            # the mapping is closed when it is collected.
+            pass
+
+
+def truncate_zero(src):
+    """
+    cut a fixed size text field at the first zero byte.
+    """
+    pos=src.find(b"\x00")
+    if pos==-1:
+        return src
+    else:
+        return src[:pos]
+
+
+VECTOR2_STRUCT=struct.Struct("=2f")
+VECTOR3_STRUCT=struct.Struct("=3f")
+RGBA_STRUCT=struct.Struct("=4f")
+
+
 class BinaryReader(object):
     """general BinaryReader
     """
@@ -336,6 +380,18 @@ class BinaryReader(object):
         result=struct.unpack(fmt, self.ios.read(size))
         return result[0]
 
+    def unpack_tuple(self, fmt, size):
+        return struct.unpack(fmt, self.ios.read(size))
+
+    def read_struct(self, s):
+        """
+        read a fixed size record by a precompiled struct.Struct
+        """
+        return s.unpack(self.ios.read(s.size))
+
+    def read_bytes(self, size):
+        return self.ios.read(size)
+
     def read_int(self, size):
         if size==1:
             return self.unpack("b", size)
@@ -360,32 +416,85 @@ class BinaryReader(object):
         return self.unpack("f", 4)
 
     def read_vector2(self):
-        return Vector2(
-                self.read_float(), 
-                self.read_float()
-                )
+        return Vector2(*self.read_struct(VECTOR2_STRUCT))
 
     def read_vector3(self):
-        return Vector3(
-                self.read_float(), 
-                self.read_float(), 
-                self.read_float()
-                )
+        return Vector3(*self.read_struct(VECTOR3_STRUCT))
 
     def read_rgba(self):
-        return RGBA(
-                self.read_float(), 
-                self.read_float(), 
-                self.read_float(),
-                self.read_float()
-                )
+        return RGBA(*self.read_struct(RGBA_STRUCT))
 
     def read_rgb(self):
-        return RGB(
-                self.read_float(), 
-                self.read_float(), 
-                self.read_float()
-                )
+        return RGB(*self.read_struct(VECTOR3_STRUCT))
+
+
+class BufferReader(BinaryReader):
+    """BinaryReader over a bytes-like buffer(bytes, bytearray, mmap...)
+
+    keeps a memoryview and an integer cursor and decodes with
+    struct.unpack_from, so no intermediate bytes object is allocated
+    for each scalar.
+    """
+    def __init__(self, buf, pos=0):
+        self.buf=buf if isinstance(buf, memoryview) else memoryview(buf)
+        self.pos=pos
+        self.end=len(self.buf)
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, pos):
+        self.pos=pos
+
+    def skip(self, size):
+        self.pos+=size
+
+    def is_end(self):
+        return self.pos>=self.end
+
+    def unpack(self, fmt, size):
+        result=struct.unpack_from(fmt, self.buf, self.pos)
+        self.pos+=size
+        return result[0]
+
+    def unpack_tuple(self, fmt, size):
+        result=struct.unpack_from(fmt, self.buf, self.pos)
+        self.pos+=size
+        return result
+
+    def read_struct(self, s):
+        result=s.unpack_from(self.buf, self.pos)
+        self.pos+=s.size
+        return result
+
+    def read_array(self, typecode, count):
+        """
+        read count little endian items to array.array at once
+        """
+        a=array.array(typecode)
+        src=self.read_bytes(a.itemsize*count)
+        if sys.version_info[0]<3:
+            a.fromstring(src)
+        else:
+            a.frombytes(src)
+        if sys.byteorder=='big':
+            a.byteswap()
+        return a
+
+    def read_bytes(self, size):
+        if self.pos+size>self.end:
+            raise ParseException("unexpected eof: {0}+{1}".format(
+                self.pos, size))
+        src=self.buf[self.pos:self.pos+size].tobytes()
+        self.pos+=size
+        return src
+
+    def release(self):
+        """
+        release the memoryview. required before closing a mmap.
+        """
+        if hasattr(self.buf, 'release'):
+            self.buf.release()
 
 
 class WriteException(Exception):
@@ -395,60 +504,245 @@ class WriteException(Exception):
     pass
 
 
+STRUCT_CACHE={}
+STRUCT_CACHE_SIZE=256
+def get_struct(fmt):
+    """
+    precompiled struct.Struct for fmt(cached).
+    formats over STRUCT_CACHE_SIZE are compiled each time.
+    """
+    s=STRUCT_CACHE.get(fmt)
+    if not s:
+        s=struct.Struct(fmt)
+        if len(STRUCT_CACHE)<STRUCT_CACHE_SIZE:
+            STRUCT_CACHE[fmt]=s
+    return s
+
+
 class BinaryWriter(object):
+    """
+    write each value to ios immediately
+    """
     def __init__(self, ios):
         self.ios=ios
 
+    def write(self, v):
+        self.ios.write(v)
+
+    def write_struct(self, s, *values):
+        """
+        write a fixed size record by a precompiled struct.Struct
+        """
+        self.write(s.pack(*values))
+
+    def pack(self, fmt, *values):
+        self.write_struct(get_struct(fmt), *values)
+
     def write_bytes(self, v, size=None):
         if size:
-            self.ios.write(struct.pack("={0}s".format(size), v))
+            self.pack("={0}s".format(size), v)
         else:
-            self.ios.write(v)
+            self.write(v)
 
     def write_float(self, v):
-        self.ios.write(struct.pack("f", v))
+        self.pack("f", v)
+
+    def write_array(self, a):
+        """
+        write array.array as little endian at once
+        """
+        if sys.byteorder=='big':
+            a=array.array(a.typecode, a)
+            a.byteswap()
+        if sys.version_info[0]<3:
+            self.write(a.tostring())
+        else:
+            self.write(a.tobytes())
 
     def write_int(self, v, size):
         if size==1:
-            self.ios.write(struct.pack("b", v))
+            self.pack("b", v)
         elif size==2:
-            self.ios.write(struct.pack("h", v))
+            self.pack("h", v)
         elif size==4:
-            self.ios.write(struct.pack("i", v))
+            self.pack("i", v)
         else:
-            raise WriteError("invalid int uint size")
+            raise WriteException("invalid int uint size")
 
     def write_uint(self, v, size):
         if v==-1:
             if size==1:
-                self.ios.write(struct.pack("B", 255))
+                self.pack("B", 255)
             elif size==2:
-                self.ios.write(struct.pack("H", 65535))
+                self.pack("H", 65535)
             elif size==4:
-                self.ios.write(struct.pack("I", 4294967295))
+                self.pack("I", 4294967295)
             else:
-                raise WriteError("invalid int uint size")
+                raise WriteException("invalid int uint size")
         else:
             if size==1:
-                self.ios.write(struct.pack("B", v))
+                self.pack("B", v)
             elif size==2:
-                self.ios.write(struct.pack("H", v))
+                self.pack("H", v)
             elif size==4:
-                self.ios.write(struct.pack("I", v))
+                self.pack("I", v)
             else:
-                raise WriteError("invalid int uint size")
+                raise WriteException("invalid int uint size")
 
     def write_vector2(self, v):
-        self.ios.write(struct.pack("=2f", v.x, v.y))
+        self.write_struct(VECTOR2_STRUCT, v.x, v.y)
 
     def write_vector3(self, v):
-        self.ios.write(struct.pack("=3f", v.x, v.y, v.z))
+        self.write_struct(VECTOR3_STRUCT, v.x, v.y, v.z)
 
     def write_rgb(self, v):
-        self.ios.write(struct.pack("=3f", v.r, v.g, v.b))
+        self.write_struct(VECTOR3_STRUCT, v.r, v.g, v.b)
 
     def write_rgba(self, v):
-        self.ios.write(struct.pack("=4f", v.r, v.g, v.b, v.a))
+        self.write_struct(RGBA_STRUCT, v.r, v.g, v.b, v.a)
+
+
+class BufferWriter(BinaryWriter):
+    """
+    serialize into a bytearray with pack_into, then write it to ios
+    at once by flush. size is the byte size before any I/O.
+
+    the buffer grows geometrically. reserve it when the size of
+    a section is known.
+    """
+    def __init__(self, ios=None, capacity=65536):
+        super(BufferWriter, self).__init__(ios)
+        self.buf=bytearray(capacity)
+        self.pos=0
+
+    @property
+    def size(self):
+        return self.pos
+
+    def reserve(self, size):
+        required=self.pos+size
+        capacity=len(self.buf)
+        if required>capacity:
+            self.buf.extend(bytearray(max(required, capacity*2)-capacity))
+
+    def write(self, v):
+        size=len(v)
+        self.reserve(size)
+        self.buf[self.pos:self.pos+size]=v
+        self.pos+=size
+
+    def write_struct(self, s, *values):
+        end=self.pos+s.size
+        if end>len(self.buf):
+            self.reserve(s.size)
+        s.pack_into(self.buf, self.pos, *values)
+        self.pos=end
+
+    def getvalue(self):
+        return bytes(self.buf[:self.pos])
+
+    def flush(self):
+        """
+        write the serialized bytes to ios with one write call.
+        """
+        view=memoryview(self.buf)
+        self.ios.write(view[:self.pos])
+        del view
+        self.pos=0
+
+
+class Section(object):
+    """
+    a section of a model or motion file.
+    offset and size include the item count prefix.
+
+    Attributes:
+        name: attribute name of the section in the model
+        offset: byte offset from the file head
+        size: byte size
+        count: item count
+    """
+    __slots__=['name', 'offset', 'size', 'count']
+    def __init__(self, name, offset, size, count):
+        self.name=name
+        self.offset=offset
+        self.size=size
+        self.count=count
+
+    def __str__(self):
+        return '<Section {0} {1}items at {2}({3}bytes)>'.format(
+                self.name, self.count, self.offset, self.size)
+
+
+class Probe(object):
+    """
+    header information and the section table of a file
+    collected without decoding the model data.
+
+    Attributes:
+        format: 'pmd', 'pmx' or 'vmd'
+        version: format version
+        name: model name
+        english_name: english model name
+        comment: model comment
+        english_comment: english model comment
+        textures: texture file names
+        sections: list of Section in the file order
+        path: file path
+    """
+    __slots__=['format', 'version', 'name', 'english_name',
+            'comment', 'english_comment', 'textures', 'sections', 'path']
+    def __init__(self, format, version, name=None):
+        self.format=format
+        self.version=version
+        self.name=name
+        self.english_name=None
+        self.comment=None
+        self.english_comment=None
+        self.textures=[]
+        self.sections=[]
+        self.path=None
+
+    def __str__(self):
+        return '<{0}-{1} "{2}" {3}>'.format(
+                self.format, self.version, self.name,
+                " ".join("{0}{1}".format(s.count, s.name)
+                    for s in self.sections))
+
+    def get_section(self, name):
+        for section in self.sections:
+            if section.name==name:
+                return section
+
+    def get_count(self, name):
+        """
+        item count of the section. 0 if the file has no such section.
+        """
+        section=self.get_section(name)
+        return section.count if section else 0
+
+
+def require_numpy(feature):
+    """
+    raise ImportError if numpy is not installed.
+    """
+    if not numpy:
+        raise ImportError("{0} requires numpy".format(feature))
+
+
+def equal_sequence(lhs, rhs):
+    """
+    compare elements of list, array.array or numpy.ndarray.
+    """
+    if len(lhs)!=len(rhs):
+        return False
+    if (numpy and isinstance(lhs, numpy.ndarray)
+            and isinstance(rhs, numpy.ndarray)):
+        return bool(numpy.array_equal(lhs, rhs))
+    for l, r in zip(lhs, rhs):
+        if l!=r:
+            return False
+    return True
 
 
 class DifferenceException(Exception):
@@ -21,8 +21,13 @@ specs
 import os
 import sys
 import math
+import struct
 import warnings
 from .. import common
+try:
+    import numpy
+except ImportError:
+    numpy=None
 
 
 """
@@ -122,16 +127,20 @@ class Obj(object):
         color_type:
         mirror: mirroring
         mirror_axis:
-        vertices:
-        faces:
+        vertices: Vector3 list, or numpy float32 (N, 3) in the array mode
+        faces: Face list, or FaceArrays of the faces and the edges in the
+            array mode
         edges:
         smoothing:
+        vertex_attributes: {name: number rows} of vertexattr(uid, weit,
+            color...), numpy float64 (K, columns) in the array mode
     """
     __slots__=["name", "depth", "folding", 
             "scale", "rotation", "translation",
             "visible", "locking", "shading", "facet",
             "color", "color_type", "mirror", "mirror_axis",
             "vertices", "faces", "edges", "smoothing",
+            "vertex_attributes",
             ]
 
     def __init__(self, name):
@@ -151,7 +160,9 @@ class Obj(object):
         self.color=[1, 1, 1]
         self.color_type=0
         self.mirror=0
+        self.mirror_axis=0
         self.smoothing=0
+        self.vertex_attributes={}
 
     def getName(self): return self.name
 
@@ -210,20 +221,9 @@ class Face(object):
                 for i in range(0, len(uv_list), 2):
                     self.uv.append(common.Vector2(uv_list[i], uv_list[i+1]))
             elif key==b"COL":
-                for n in params:
-                    d=int(n)
-                    # R
-                    d, m=divmod(d, 256)
-                    self.col.append(m)
-                    # G
-                    d, m=divmod(d, 256)
-                    self.col.append(m)
-                    # B
-                    d, m=divmod(d, 256)
-                    self.col.append(m)
-                    # A
-                    d, m=divmod(d, 256)
-                    self.col.append(m)
+                # rgba from the lowest byte
+                self.col.extend(bytearray(struct.pack(
+                    "<%dI" % len(params), *[int(n) for n in params])))
             else:
                 print("Face#__init__:unknown key: %s" % key)
 
@@ -233,6 +233,42 @@ class Face(object):
     def getUV(self, i): return self.uv[i] if i<len(self.uv) else common.Vector2(0, 0)
 
 
+class FaceArrays(object):
+    """mqo faces of an object in numpy arrays(array mode)
+
+    the faces and the edges are stored together. the corners of the face i
+    are offsets[i]:offsets[i+1].
+
+    Attributes:
+        counts: uint16 (N,) index count of the faces, 2 for the edges.
+            more than 4 for the n-gons
+        offsets: int64 (N+1,) first corner of the faces
+        indices: int32 (C,) vertex indices of the corners
+        material_indices: int32 (N,) 0 for the faces without M
+        uvs: float32 (C, 2) 0 for the faces without UV
+        colors: uint8 (C, 4) rgba. white for the faces without COL
+    """
+    __slots__=[
+            "counts", "offsets", "indices", "material_indices",
+            "uvs", "colors",
+            ]
+    def __init__(self, counts, indices, material_indices, uvs, colors):
+        self.counts=counts
+        self.offsets=numpy.zeros(len(counts)+1, numpy.int64)
+        numpy.cumsum(counts, out=self.offsets[1:])
+        self.indices=indices
+        self.material_indices=material_indices
+        self.uvs=uvs
+        self.colors=colors
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __str__(self):
+        return "<FaceArrays %d faces, %d corners>" % (
+                len(self.counts), len(self.indices))
+
+
 class Model(object):
     def __init__(self):
         self.has_mikoto=False
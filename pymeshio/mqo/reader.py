@@ -1,35 +1,67 @@
 # coding: utf-8
 """
 mqo reader
+
+the whole document is read to memory and scanned by a cursor.
+the vertex blocks are converted at once.
 """
 import io
+import re
+import struct
+import warnings
+from .. import common
 from .. import mqo
+try:
+    import numpy
+except ImportError:
+    numpy=None
 
 class Reader(object):
     """mqo reader
     """
     __slots__=[
             "has_mikoto",
-            "eof", "ios", "lines",
+            "eof", "buf", "pos", "lines", "array",
             "materials", "objects",
             ]
-    def __init__(self, ios):
-        self.ios=ios
+    def __init__(self, buf, array=False):
+        self.buf=buf
+        self.pos=0
         self.eof=False
         self.lines=0
+        self.array=array
 
     def __str__(self):
         return "<MQO %d lines, %d materials, %d objects>" % (
                 self.lines, len(self.materials), len(self.objects))
 
     def getline(self):
-        line=self.ios.readline()
-        self.lines+=1
-        if line==b"":
+        if self.pos>=len(self.buf):
             self.eof=True
             return None
+        end=self.buf.find(b"\n", self.pos)
+        if end==-1:
+            end=len(self.buf)
+        line=self.buf[self.pos:end]
+        self.pos=end+1
+        self.lines+=1
         return line.strip()
 
+    def getblock(self):
+        """
+        returns the bytes of the block body to the closing brace and skips
+        the rest of the line. None for eof.
+        """
+        end=self.buf.find(b"}", self.pos)
+        if end==-1:
+            self.eof=True
+            return None
+        block=self.buf[self.pos:end]
+        self.lines+=block.count(b"\n")
+        self.pos=end
+        self.getline()
+        return block
+
     def printError(self, method, msg):
         print("%s:%s:%d" % (method, msg, self.lines))
 
@@ -50,23 +82,47 @@ class Reader(object):
                 tokens=line.split()
                 key=tokens[0]
                 if key==b"vertex":
-                    if not self.readVertex(obj):
+                    if not self.readVertex(obj, int(tokens[1])):
                         return False
                 elif key==b"face":
-                    if not self.readFace(obj):
+                    if not self.readFace(obj, int(tokens[1])):
+                        return False
+                elif key==b"BVertex":
+                    if not self.readBVertex(obj, int(tokens[1])):
+                        return False
+                elif key==b"vertexattr":
+                    if not self.readVertexAttr(obj):
                         return False
-                elif key==b"depth":
-                    obj.depth=int(tokens[1])
+                elif key in OBJECT_INT_KEYS:
+                    setattr(obj, OBJECT_INT_KEYS[key], int(tokens[1]))
+                elif key in OBJECT_FLOAT_KEYS:
+                    setattr(obj, OBJECT_FLOAT_KEYS[key], float(tokens[1]))
+                elif key in OBJECT_VECTOR_KEYS:
+                    setattr(obj, OBJECT_VECTOR_KEYS[key],
+                            [float(v) for v in tokens[1:]])
                 else:
                     print(
                             "%s#readObject" % name,
                             "unknown key: %s" % key
                             )
+                    if tokens[-1]==b"{" and not self.readChunk():
+                        return False
 
         self.printError("readObject", "invalid eof")
         return False
 
-    def readFace(self, obj):
+    def readFace(self, obj, count):
+        if self.array:
+            block=self.getblock()
+            if block is None:
+                self.printError("readFace", "invalid eof")
+                return False
+            try:
+                obj.faces=parse_faces(block, count)
+            except (common.ParseException, ValueError) as ex:
+                self.printError("readFace", ex)
+                return False
+            return True
         while(True):
             line=self.getline()
             if line==None:
@@ -90,7 +146,45 @@ class Reader(object):
         self.printError("readFace", "invalid eof")
         return False
 
-    def readVertex(self, obj):
+    def readBVertex(self, obj, count):
+        """
+        binary vertices. a Vector line with the byte size is followed by
+        the little endian float x, y, z of the vertices.
+        """
+        line=self.getline()
+        tokens=line.split() if line else []
+        if len(tokens)!=3 or tokens[0]!=b"Vector":
+            self.printError("readBVertex", "no Vector")
+            return False
+        size=int(tokens[2].strip(b"[]"))
+        if size!=count*12 or self.pos+size>len(self.buf):
+            self.printError("readBVertex",
+                    "%d bytes for %d vertices" % (size, count))
+            return False
+        data=self.buf[self.pos:self.pos+size]
+        self.pos+=size
+        if self.array:
+            obj.vertices=numpy.frombuffer(data, '<f4').astype(
+                    numpy.float32).reshape(-1, 3)
+        else:
+            values=struct.unpack("<%df" % (count*3), data)
+            obj.vertices=[common.Vector3(*values[i:i+3])
+                    for i in range(0, len(values), 3)]
+        while(True):
+            line=self.getline()
+            if line==None:
+                # eof
+                break;
+            if line==b"}":
+                return True
+
+        self.printError("readBVertex", "invalid eof")
+        return False
+
+    def readVertexAttr(self, obj):
+        """
+        vertex attribute blocks(uid, weit, color...) of number rows.
+        """
         while(True):
             line=self.getline()
             if line==None:
@@ -103,12 +197,39 @@ class Reader(object):
             if line==b"}":
                 return True
             else:
-                # vertex
-                obj.addVertex(*[float(v) for v in line.split()])
+                tokens=line.split()
+                if tokens[-1]!=b"{":
+                    self.printError("readVertexAttr", "unknown line")
+                    continue
+                block=self.getblock()
+                if block is None:
+                    break
+                rows=[[float(v) for v in l.split()]
+                        for l in block.split(b"\n") if l.strip()]
+                if self.array:
+                    rows=numpy.array(rows, numpy.float64)
+                obj.vertex_attributes[tokens[0]]=rows
 
-        self.printError("readVertex", "invalid eof")
+        self.printError("readVertexAttr", "invalid eof")
         return False
 
+    def readVertex(self, obj, count):
+        block=self.getblock()
+        if block is None:
+            self.printError("readVertex", "invalid eof")
+            return False
+        values=parse_floats(block, self.array)
+        if len(values)!=count*3:
+            self.printError("readVertex",
+                    "%d values for %d vertices" % (len(values), count))
+            return False
+        if self.array:
+            obj.vertices=values.reshape(-1, 3)
+        else:
+            obj.vertices=[common.Vector3(*values[i:i+3])
+                    for i in range(0, len(values), 3)]
+        return True
+
     def readMaterial(self):
         materials=[]
         while(True):
@@ -158,19 +279,161 @@ class Reader(object):
         return False
 
 
-def read_from_file(path):
+def parse_floats(block, array=False):
+    """
+    parse the white space separated floats of a block.
+    a float32 array in the array mode.
+    """
+    if not array:
+        return [float(v) for v in block.split()]
+    with warnings.catch_warnings():
+        # a partial result for invalid text is checked by the caller
+        warnings.simplefilter("ignore", DeprecationWarning)
+        return numpy.fromstring(block, numpy.float32, sep=' ')
+
+
+# scalar and vector keys of an object to the mqo.Obj attributes
+OBJECT_INT_KEYS={
+        b"depth": "depth",
+        b"folding": "folding",
+        b"visible": "visible",
+        b"locking": "locking",
+        b"shading": "shading",
+        b"color_type": "color_type",
+        b"mirror": "mirror",
+        b"mirror_axis": "mirror_axis",
+        }
+OBJECT_FLOAT_KEYS={
+        b"facet": "facet",
+        }
+OBJECT_VECTOR_KEYS={
+        b"scale": "scale",
+        b"rotation": "rotation",
+        b"translation": "translation",
+        b"color": "color",
+        }
+# parameters of a face key. the keys are separated by a space.
+FACE_KEY_PATTERNS=dict((key, re.compile(b" "+key+br"\(([^)]*)\)"))
+    for key in [b"V", b"M", b"UV", b"COL"])
+
+
+def parse_ints(block, dtype):
+    """
+    parse the white space separated integers of a block to a numpy array.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        return numpy.fromstring(block, dtype, sep=' ')
+
+
+def find_face_params(block, key, starts):
+    """
+    returns the face indices and the joined parameters of the key.
+
+    :Parameters:
+      block
+        bytes of the face lines
+      key
+        V, M, UV or COL
+      starts
+        positions of the face lines in the block
+    """
+    pattern=FACE_KEY_PATTERNS[key]
+    params=pattern.findall(block)
+    if len(params)==len(starts):
+        # every face has the key
+        return numpy.arange(len(starts)), b" ".join(params)
+    positions=[m.start() for m in pattern.finditer(block)]
+    faces=numpy.searchsorted(starts, positions, 'right')-1
+    return faces, b" ".join(params)
+
+
+def get_corners(offsets, counts, faces):
+    """
+    returns the corner indices of the faces.
+    """
+    counts=counts[faces].astype(numpy.int64)
+    heads=numpy.cumsum(counts)-counts
+    return (numpy.repeat(offsets[faces]-heads, counts)
+            +numpy.arange(counts.sum()))
+
+
+def parse_faces(block, count):
+    """
+    parse a face block to mqo.FaceArrays at once.
+
+    :Parameters:
+      block
+        bytes of the face lines
+      count
+        face count of the block header
+    """
+    lines=block.split(b"\n")
+    lengths=numpy.array([len(l)+1 for l in lines], numpy.int64)
+    face_lines=[i for i, l in enumerate(lines) if l.strip()]
+    if len(face_lines)!=count:
+        raise common.ParseException(
+                "%d faces for the count %d" % (len(face_lines), count))
+    starts=(numpy.cumsum(lengths)-lengths)[face_lines]
+    counts=numpy.array([lines[i].split(None, 1)[0] for i in face_lines]
+            ).astype(numpy.int64)
+    # the n-gons of Ver 1.1 are kept
+    if ((counts<2) | (counts>0xffff)).any():
+        raise common.ParseException("invalid vertex count")
+    counts=counts.astype(numpy.uint16)
+    faces=mqo.FaceArrays(counts, None, numpy.zeros(count, numpy.int32),
+            None, None)
+    corner_count=int(faces.offsets[-1])
+
+    face_indices, params=find_face_params(block, b"V", starts)
+    indices=parse_ints(params, numpy.int32)
+    if (len(face_indices)!=count or len(indices)!=corner_count):
+        raise common.ParseException("invalid V of faces")
+    faces.indices=indices
+
+    face_indices, params=find_face_params(block, b"M", starts)
+    material_indices=parse_ints(params, numpy.int32)
+    if len(material_indices)!=len(face_indices):
+        raise common.ParseException("invalid M of faces")
+    faces.material_indices[face_indices]=material_indices
+
+    faces.uvs=numpy.zeros((corner_count, 2), numpy.float32)
+    face_indices, params=find_face_params(block, b"UV", starts)
+    if len(face_indices):
+        corners=get_corners(faces.offsets, counts, face_indices)
+        uvs=parse_floats(params, True)
+        if len(uvs)!=len(corners)*2:
+            raise common.ParseException("invalid UV of faces")
+        faces.uvs[corners]=uvs.reshape(-1, 2)
+
+    faces.colors=numpy.full((corner_count, 4), 255, numpy.uint8)
+    face_indices, params=find_face_params(block, b"COL", starts)
+    if len(face_indices):
+        corners=get_corners(faces.offsets, counts, face_indices)
+        colors=parse_ints(params, numpy.int64)
+        if len(colors)!=len(corners):
+            raise common.ParseException("invalid COL of faces")
+        # the lowest byte is red
+        faces.colors[corners]=colors.astype('<u4').view(
+                numpy.uint8).reshape(-1, 4)
+    return faces
+
+
+def read_from_file(path, array=False):
     """
     read from file path, then return the pymeshio.mqo.Model.
 
     :Parameters:
       path
         file path
+      array
+        vertices to numpy float32 (N, 3) arrays and faces to
+        mqo.FaceArrays(requires numpy).
     """
-    with io.open(path, 'rb') as ios:
-        return read(ios)
+    return read_from_buffer(common.readall(path), array)
 
 
-def read(ios):
+def read(ios, array=False):
     """
     read from ios, then return the pymeshio.mqo.Model.
 
@@ -179,18 +442,38 @@ def read(ios):
         input stream (in io.IOBase)
     """
     assert(isinstance(ios, io.IOBase))
-    reader=Reader(ios)
+    return read_from_buffer(ios.read(), array)
+
+
+def read_from_buffer(buf, array=False):
+    """
+    read from bytes-like buffer, then return the pymeshio.mqo.Model.
+    """
+    if array:
+        common.require_numpy("array mode")
+    reader=Reader(bytes(buf), array)
     model=mqo.Model()
+    read_header(reader)
+    for obj in iter_document(reader, model):
+        model.objects.append(obj)
+    return model
+
 
+def read_header(reader):
     line=reader.getline()
     if line!=b"Metasequoia Document":
-        print("invalid signature")
-        return False
+        raise common.ParseException("invalid signature")
 
     line=reader.getline()
-    if line!=b"Format Text Ver 1.0":
+    if line not in (b"Format Text Ver 1.0", b"Format Text Ver 1.1"):
         print("unknown version: %s" % line)
 
+
+def iter_document(reader, model):
+    """
+    read the chunks of the document to Eof. the materials are set to
+    the model and the objects are yielded.
+    """
     while True:
         line=reader.getline()
         if line==None:
@@ -203,25 +486,25 @@ def read(ios):
         tokens=line.split()
         key=tokens[0]
         if key==b"Eof":
-            return model
+            return
         elif key==b"Scene":
             if not reader.readChunk():
-                return
+                break
         elif key==b"Material":
             materials=reader.readMaterial()
-            if not materials:
-                return
+            if materials is False:
+                break
             model.materials=materials
         elif key==b"Object":
             firstQuote=line.find(b'"')
             secondQuote=line.find(b'"', firstQuote+1)
             obj=reader.readObject(line[firstQuote+1:secondQuote])
             if not obj:
-                return
-            model.objects.append(obj)
+                break
+            yield obj
         elif key==b"BackImage":
             if not reader.readChunk():
-                return
+                break
         elif key==b"IncludeXml":
             firstQuote=line.find(b'"')
             secondQuote=line.find(b'"', firstQuote+1)
@@ -229,7 +512,78 @@ def read(ios):
         else:
             print("unknown key: %s" % key)
             if not reader.readChunk():
-                return
-    # error not reach here
-    raise ParseException("invalid eof")
+                break
+    raise common.ParseException("invalid document at line %d" % reader.lines)
+
 
+class ObjectIterator(object):
+    """
+    iterator of the objects of a mqo file.
+
+    :IVariables:
+        materials
+            mqo.Material list of the document
+    """
+    __slots__=["materials", "first", "objects"]
+    def __init__(self, materials, first, objects):
+        self.materials=materials
+        self.first=first
+        self.objects=objects
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.first is not None:
+            obj=self.first
+            self.first=None
+            return obj
+        return next(self.objects)
+
+    next=__next__
+
+    def close(self):
+        """
+        unmap the file before the end of the objects.
+        """
+        self.first=None
+        self.objects.close()
+
+
+def __iter_objects(path, array, model):
+    with common.open_mapped(path) as buf:
+        reader=Reader(buf, array)
+        read_header(reader)
+        for obj in iter_document(reader, model):
+            yield obj
+
+
+def iter_objects(path, array=False):
+    """
+    iterate the objects of the mqo file one by one without building
+    the model. the file is mapped, so that the memory usage does not
+    depend on the object count.
+
+    :Parameters:
+      path
+        file path
+      array
+        vertices to numpy float32 (N, 3) arrays and faces to
+        mqo.FaceArrays(requires numpy).
+
+    returns ObjectIterator. the materials are read up front.
+
+    >>> import pymeshio.mqo.reader
+    >>> objects=pymeshio.mqo.reader.iter_objects('resources/cube.mqo')
+    >>> print(len(objects.materials))
+    >>> for obj in objects:
+    ...     print(obj)
+
+    """
+    if array:
+        common.require_numpy("array mode")
+    model=mqo.Model()
+    objects=__iter_objects(path, array, model)
+    # the materials precede the objects
+    first=next(objects, None)
+    return ObjectIterator(model.materials, first, objects)
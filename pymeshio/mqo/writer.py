@@ -0,0 +1,183 @@
+# coding: utf-8
+"""
+mqo writer
+
+the document is built as a list of lines and written at once.
+"""
+import io
+import struct
+from .. import mqo
+try:
+    import numpy
+except ImportError:
+    numpy=None
+
+
+def format_floats(values, fmt=b"%.4f"):
+    return b" ".join(fmt % v for v in values)
+
+
+def pack_colors(col):
+    """
+    rgba bytes of the corners to the COL values.
+    """
+    return struct.unpack("<%dI" % (len(col)//4), bytes(bytearray(col)))
+
+
+class Writer(object):
+    """mqo writer
+
+    :Parameters:
+      bvertex_count
+        write the vertices of an object in a binary BVertex chunk
+        if it has this or more vertices. None for the text only.
+    """
+    __slots__=["lines", "bvertex_count"]
+    def __init__(self, bvertex_count=None):
+        self.lines=[]
+        self.bvertex_count=bvertex_count
+
+    def getvalue(self):
+        return b"\r\n".join(self.lines)+b"\r\n"
+
+    def write_material(self, material):
+        line=(b'\t"'+material.name+b'" shader(%d) col(%s) dif(%.3f) '
+                b'amb(%.3f) emi(%.3f) spc(%.3f) power(%.2f)' % (
+                    material.shader,
+                    format_floats(material.color[i] for i in range(4)),
+                    material.diffuse, material.ambient, material.emit,
+                    material.specular, material.power))
+        if material.tex:
+            line+=b' tex("'+material.tex+b'")'
+        self.lines.append(line)
+
+    def write_vertices(self, vertices):
+        if numpy and isinstance(vertices, numpy.ndarray):
+            positions=numpy.asarray(vertices, '<f4').reshape(-1, 3)
+        else:
+            positions=[(v.x, v.y, v.z) for v in vertices]
+        count=len(positions)
+        if self.bvertex_count is not None and count>=self.bvertex_count:
+            if numpy and isinstance(positions, numpy.ndarray):
+                data=positions.tobytes()
+            else:
+                data=struct.pack("<%df" % (count*3),
+                        *[x for p in positions for x in p])
+            self.lines.append(b"\tBVertex %d {" % count)
+            # the binary follows the Vector line
+            self.lines.append(b"\t\tVector %d [%d]\r\n" % (count, len(data))
+                    +data)
+            self.lines.append(b"\t}")
+            return
+        self.lines.append(b"\tvertex %d {" % count)
+        if numpy and isinstance(positions, numpy.ndarray):
+            positions=positions.tolist()
+        self.lines.extend(b"\t\t"+format_floats(p) for p in positions)
+        self.lines.append(b"\t}")
+
+    def write_face(self, count, indices, material_index, uvs, colors):
+        line=b"\t\t%d V(%s) M(%d)" % (count,
+                b" ".join(b"%d" % i for i in indices), material_index)
+        if count>2:
+            line+=b" UV("+format_floats(uvs, b"%.5f")+b")"
+        if colors:
+            line+=b" COL("+b" ".join(b"%d" % c for c in colors)+b")"
+        self.lines.append(line)
+
+    def write_faces(self, obj):
+        faces=obj.faces
+        if isinstance(faces, mqo.FaceArrays):
+            self.lines.append(b"\tface %d {" % len(faces))
+            white=(faces.colors==255).all(axis=1)
+            colors=faces.colors.reshape(-1).view('<u4')
+            counts=faces.counts.tolist()
+            offsets=faces.offsets.tolist()
+            indices=faces.indices.tolist()
+            materials=faces.material_indices.tolist()
+            uvs=faces.uvs.reshape(-1).tolist()
+            for i, count in enumerate(counts):
+                begin=offsets[i]
+                end=offsets[i+1]
+                self.write_face(count, indices[begin:end], materials[i],
+                        uvs[begin*2:end*2],
+                        None if white[begin:end].all()
+                        else colors[begin:end].tolist())
+            self.lines.append(b"\t}")
+            return
+        faces=obj.faces+obj.edges
+        self.lines.append(b"\tface %d {" % len(faces))
+        for face in faces:
+            self.write_face(face.index_count, face.indices,
+                    face.material_index,
+                    [x for i in range(face.index_count)
+                        for x in face.getUV(i).to_tuple()],
+                    pack_colors(face.col) if face.col else None)
+        self.lines.append(b"\t}")
+
+    def write_vertex_attributes(self, obj):
+        if not obj.vertex_attributes:
+            return
+        self.lines.append(b"\tvertexattr {")
+        for name in sorted(obj.vertex_attributes.keys()):
+            rows=obj.vertex_attributes[name]
+            if numpy and isinstance(rows, numpy.ndarray):
+                rows=rows.tolist()
+            self.lines.append(b"\t\t"+name+b" {")
+            self.lines.extend(b"\t\t\t"+format_floats(row, b"%.10g")
+                    for row in rows)
+            self.lines.append(b"\t\t}")
+        self.lines.append(b"\t}")
+
+    def write_object(self, obj):
+        self.lines.append(b'Object "'+obj.name+b'" {')
+        self.lines.append(b"\tdepth %d" % obj.depth)
+        self.lines.append(b"\tfolding %d" % obj.folding)
+        self.lines.append(b"\tscale %s" % format_floats(obj.scale, b"%.6f"))
+        self.lines.append(b"\trotation %s" % format_floats(obj.rotation, b"%.6f"))
+        self.lines.append(b"\ttranslation %s" % format_floats(obj.translation, b"%.6f"))
+        self.lines.append(b"\tvisible %d" % obj.visible)
+        self.lines.append(b"\tlocking %d" % obj.locking)
+        self.lines.append(b"\tshading %d" % obj.shading)
+        self.lines.append(b"\tfacet %.1f" % obj.facet)
+        self.lines.append(b"\tcolor %s" % format_floats(obj.color, b"%.3f"))
+        self.lines.append(b"\tcolor_type %d" % obj.color_type)
+        if obj.mirror:
+            self.lines.append(b"\tmirror %d" % obj.mirror)
+            self.lines.append(b"\tmirror_axis %d" % obj.mirror_axis)
+        self.write_vertices(obj.vertices)
+        self.write_vertex_attributes(obj)
+        self.write_faces(obj)
+        self.lines.append(b"}")
+
+
+def write(ios, model, bvertex_count=None):
+    """
+    write model to ios.
+
+    :Parameters:
+        ios
+            output stream (in io.IOBase)
+        model
+            mqo.Model of the object or the array mode
+        bvertex_count
+            write the vertices of the objects that have this or more
+            vertices in binary BVertex chunks. None for the text only.
+
+    >>> import pymeshio.mqo.writer
+    >>> pymeshio.mqo.writer.write(io.open('out.mqo', 'wb'), model)
+
+    """
+    assert(isinstance(ios, io.IOBase))
+    assert(isinstance(model, mqo.Model))
+    writer=Writer(bvertex_count)
+    writer.lines+=[b"Metasequoia Document", b"Format Text Ver 1.0", b""]
+    if model.materials:
+        writer.lines.append(b"Material %d {" % len(model.materials))
+        for material in model.materials:
+            writer.write_material(material)
+        writer.lines.append(b"}")
+    for obj in model.objects:
+        writer.write_object(obj)
+    writer.lines.append(b"Eof")
+    ios.write(writer.getvalue())
+    return True
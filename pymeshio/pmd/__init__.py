@@ -22,6 +22,55 @@ import sys
 import struct
 import warnings
 from .. import common
+try:
+    import numpy
+except ImportError:
+    numpy=None
+
+
+"""
+fixed size record layouts(little endian, no padding)
+"""
+# pos(3f), normal(3f), uv(2f), bone0, bone1, weight0, edge_flag
+VERTEX_STRUCT=struct.Struct("<8f2H2B")
+# diffuse_color, alpha, specular_factor, specular_color, ambient_color,
+# toon_index, edge_flag, vertex_count, texture_file
+MATERIAL_STRUCT=struct.Struct("<3fff3f3fbBI20s")
+# name, parent_index, tail_index, type, ik_index, pos
+BONE_STRUCT=struct.Struct("<20s2HBH3f")
+# index, target, length, iterations, weight. followed by length children
+IK_STRUCT=struct.Struct("<2HBHf")
+# name, vertex count, type. followed by vertex count MORPH_OFFSET_STRUCT
+MORPH_STRUCT=struct.Struct("<20sIB")
+# index, pos
+MORPH_OFFSET_STRUCT=struct.Struct("<I3f")
+# name, bone_index, collision_group, no_collision_group, shape_type,
+# shape_size, shape_position, shape_rotation,
+# mass, linear_damping, angular_damping, restitution, friction, mode
+RIGIDBODY_STRUCT=struct.Struct("<20shbhB3f3f3f5fB")
+# name, rigidbody_index_a, rigidbody_index_b,
+# position, rotation, translation_limit_min, translation_limit_max,
+# rotation_limit_min, rotation_limit_max,
+# spring_constant_translation, spring_constant_rotation
+JOINT_STRUCT=struct.Struct("<20s2I24f")
+assert(VERTEX_STRUCT.size==38)
+assert(MATERIAL_STRUCT.size==70)
+assert(BONE_STRUCT.size==39)
+assert(IK_STRUCT.size==11)
+assert(RIGIDBODY_STRUCT.size==83)
+assert(JOINT_STRUCT.size==124)
+if numpy:
+    # same layout as VERTEX_STRUCT
+    VERTEX_DTYPE=numpy.dtype([
+        ('pos', '<f4', (3,)),
+        ('normal', '<f4', (3,)),
+        ('uv', '<f4', (2,)),
+        ('bone0', '<u2'),
+        ('bone1', '<u2'),
+        ('weight0', 'u1'),
+        ('edge_flag', 'u1'),
+        ])
+    assert(VERTEX_DTYPE.itemsize==38)
 
 
 class Vertex(common.Diff):
@@ -91,6 +140,105 @@ class Vertex(common.Diff):
             assert(False)
 
 
+class VertexBuffer(object):
+    """
+    =================
+    pmd vertex buffer
+    =================
+    columnar vertices for the array mode.
+    a numpy structured array(VERTEX_DTYPE) in the file layout.
+
+    list like. vertices[i] returns a Vertex.
+
+    :IVariables:
+        array
+            numpy array of VERTEX_DTYPE
+    """
+    __slots__=['array']
+    def __init__(self, array=None):
+        common.require_numpy("pmd.VertexBuffer")
+        self.array=(array if array is not None
+                else numpy.zeros(0, VERTEX_DTYPE))
+
+    @staticmethod
+    def from_vertices(vertices):
+        array=numpy.zeros(len(vertices), VERTEX_DTYPE)
+        for i, v in enumerate(vertices):
+            array[i]=(v.pos.to_tuple(), v.normal.to_tuple(), v.uv.to_tuple(),
+                    v.bone0, v.bone1, v.weight0, v.edge_flag)
+        return VertexBuffer(array)
+
+    def __str__(self):
+        return "<pmd.VertexBuffer %d vertices>" % len(self.array)
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return VertexBuffer(self.array[key])
+        v=self.array[key]
+        return Vertex(
+                common.Vector3(*v['pos'].tolist()),
+                common.Vector3(*v['normal'].tolist()),
+                common.Vector2(*v['uv'].tolist()),
+                int(v['bone0']), int(v['bone1']),
+                int(v['weight0']), int(v['edge_flag']))
+
+    def __iter__(self):
+        for i in range(len(self.array)):
+            yield self[i]
+
+    def __eq__(self, rhs):
+        if not isinstance(rhs, VertexBuffer):
+            return common.equal_sequence(self, rhs)
+        if len(self.array)!=len(rhs.array):
+            return False
+        # same tolerance as Vector3.__eq__
+        for key in ['pos', 'normal']:
+            if not numpy.allclose(self.array[key], rhs.array[key],
+                    rtol=0, atol=11e-3):
+                return False
+        for key in ['uv', 'bone0', 'bone1', 'weight0', 'edge_flag']:
+            if not numpy.array_equal(self.array[key], rhs.array[key]):
+                return False
+        return True
+
+    def __ne__(self, rhs):
+        return not self.__eq__(rhs)
+
+    @property
+    def pos(self):
+        return self.array['pos']
+
+    @property
+    def normal(self):
+        return self.array['normal']
+
+    @property
+    def uv(self):
+        return self.array['uv']
+
+    @property
+    def bone0(self):
+        return self.array['bone0']
+
+    @property
+    def bone1(self):
+        return self.array['bone1']
+
+    @property
+    def weight0(self):
+        return self.array['weight0']
+
+    @property
+    def edge_flag(self):
+        return self.array['edge_flag']
+
+    def tobytes(self):
+        return self.array.tobytes()
+
+
 class Material(common.Diff):
     """
     ============
@@ -678,7 +826,7 @@ class Model(common.Diff):
                 and self.english_name==rhs.english_name
                 and self.english_comment==rhs.english_comment
                 and self.vertices==rhs.vertices
-                and self.indices==rhs.indices
+                and common.equal_sequence(self.indices, rhs.indices)
                 and self.materials==rhs.materials
                 and self.bones==rhs.bones
                 and self.ik_list==rhs.ik_list
@@ -5,135 +5,223 @@ pmd reader
 import io
 from .. import common
 from .. import pmd
+try:
+    import numpy
+except ImportError:
+    numpy=None
 
 
-class Reader(common.BinaryReader):
+class Reader(common.BufferReader):
     """pmx reader
     """
-    def __init__(self, ios, version):
-        super(Reader, self).__init__(ios)
+    def __init__(self, buf, version, pos=0):
+        super(Reader, self).__init__(buf, pos)
         self.version=version
 
     def read_text(self, size):
         """read cp932 text
         """
-        src=self.unpack("%ds" % size, size)
-        assert(type(src)==bytes)
-        pos = src.find(b"\x00")
-        if pos==-1:
-            return src
-        else:
-            return src[:pos]
+        return common.truncate_zero(self.read_bytes(size))
 
     def read_vertex(self):
+        (px, py, pz, nx, ny, nz, u, v,
+                bone0, bone1, weight0, edge_flag
+                )=self.read_struct(pmd.VERTEX_STRUCT)
         return pmd.Vertex(
-                self.read_vector3(),
-                self.read_vector3(),
-                self.read_vector2(),
-                self.read_uint(2),
-                self.read_uint(2),
-                self.read_uint(1),
-                self.read_uint(1))
+                common.Vector3(px, py, pz),
+                common.Vector3(nx, ny, nz),
+                common.Vector2(u, v),
+                bone0,
+                bone1,
+                weight0,
+                edge_flag)
+
+    def read_vertex_buffer(self, count):
+        """
+        decode the vertex section at once(array mode).
+        copied so that the result does not refer the source buffer.
+        """
+        array=numpy.frombuffer(self.buf, pmd.VERTEX_DTYPE, count, self.pos)
+        self.pos+=pmd.VERTEX_DTYPE.itemsize*count
+        return pmd.VertexBuffer(array.copy())
+
+    def read_index_array(self, count):
+        """
+        decode the index section at once(array mode).
+        """
+        array=numpy.frombuffer(self.buf, '<u2', count, self.pos)
+        self.pos+=2*count
+        return array.copy()
 
     def read_material(self):
+        (dr, dg, db, alpha, specular_factor, sr, sg, sb, ar, ag, ab,
+                toon_index, edge_flag, vertex_count, texture_file
+                )=self.read_struct(pmd.MATERIAL_STRUCT)
         return pmd.Material(
-                diffuse_color=self.read_rgb(),
-                alpha=self.read_float(),
-                specular_factor=self.read_float(),
-                specular_color=self.read_rgb(),
-                ambient_color=self.read_rgb(),
-                toon_index=self.read_int(1),
-                edge_flag=self.read_uint(1),
-                vertex_count=self.read_uint(4),
-                texture_file=self.read_text(20)
+                diffuse_color=common.RGB(dr, dg, db),
+                alpha=alpha,
+                specular_factor=specular_factor,
+                specular_color=common.RGB(sr, sg, sb),
+                ambient_color=common.RGB(ar, ag, ab),
+                toon_index=toon_index,
+                edge_flag=edge_flag,
+                vertex_count=vertex_count,
+                texture_file=common.truncate_zero(texture_file)
                 )
 
     def read_bone(self):
-        name=self.read_text(20)
-        parent_index=self.read_uint(2)
-        tail_index=self.read_uint(2)
-        bone=pmd.createBone(name, self.read_uint(1))
+        (name, parent_index, tail_index, bone_type, ik_index, x, y, z
+                )=self.read_struct(pmd.BONE_STRUCT)
+        bone=pmd.createBone(common.truncate_zero(name), bone_type)
         bone.parent_index=parent_index
         bone.tail_index=tail_index
-        bone.ik_index = self.read_uint(2)
-        bone.pos = self.read_vector3()
+        bone.ik_index = ik_index
+        bone.pos = common.Vector3(x, y, z)
         return bone
 
     def read_ik(self):
-        ik=pmd.IK(self.read_uint(2), self.read_uint(2))
-        ik.length = self.read_uint(1)
-        ik.iterations = self.read_uint(2)
-        ik.weight = self.read_float()
-        ik.children=[self.read_uint(2) for _ in range(ik.length)]
+        (index, target, length, iterations, weight
+                )=self.read_struct(pmd.IK_STRUCT)
+        ik=pmd.IK(index, target)
+        ik.length = length
+        ik.iterations = iterations
+        ik.weight = weight
+        ik.children=list(self.unpack_tuple("<%dH" % length, 2*length))
         return ik
 
     def read_morph(self):
-        morph=pmd.Morph(self.read_text(20))
-        morph_size = self.read_uint(4)
-        morph.type = self.read_uint(1)
+        name, morph_size, morph_type=self.read_struct(pmd.MORPH_STRUCT)
+        morph=pmd.Morph(common.truncate_zero(name))
+        morph.type = morph_type
         for j in range(morph_size):
-            morph.indices.append(self.read_uint(4))
-            morph.pos_list.append(self.read_vector3())
+            index, x, y, z=self.read_struct(pmd.MORPH_OFFSET_STRUCT)
+            morph.indices.append(index)
+            morph.pos_list.append(common.Vector3(x, y, z))
         return morph
 
     def read_rigidbody(self):
+        (name, bone_index, collision_group, no_collision_group, shape_type,
+                sx, sy, sz, px, py, pz, rx, ry, rz,
+                mass, linear_damping, angular_damping, restitution, friction,
+                mode)=self.read_struct(pmd.RIGIDBODY_STRUCT)
         return pmd.RigidBody(
-                name=self.read_text(20), 
-                bone_index=self.read_int(2),
-                collision_group=self.read_int(1),
-                no_collision_group=self.read_int(2),
-                shape_type=self.read_uint(1),
-                shape_size=self.read_vector3(),
-                shape_position=self.read_vector3(),
-                shape_rotation=self.read_vector3(),
-                mass=self.read_float(),
-                linear_damping=self.read_float(),
-                angular_damping=self.read_float(),
-                restitution=self.read_float(),
-                friction=self.read_float(),
-                mode=self.read_uint(1)
+                name=common.truncate_zero(name),
+                bone_index=bone_index,
+                collision_group=collision_group,
+                no_collision_group=no_collision_group,
+                shape_type=shape_type,
+                shape_size=common.Vector3(sx, sy, sz),
+                shape_position=common.Vector3(px, py, pz),
+                shape_rotation=common.Vector3(rx, ry, rz),
+                mass=mass,
+                linear_damping=linear_damping,
+                angular_damping=angular_damping,
+                restitution=restitution,
+                friction=friction,
+                mode=mode
                 )
 
     def read_joint(self):
+        values=self.read_struct(pmd.JOINT_STRUCT)
+        v=[common.Vector3(*values[i:i+3]) for i in range(3, 27, 3)]
         return pmd.Joint(
-                name=self.read_text(20),
-                rigidbody_index_a=self.read_uint(4),
-                rigidbody_index_b=self.read_uint(4),
-                position=self.read_vector3(),
-                rotation=self.read_vector3(),
-                translation_limit_min=self.read_vector3(),
-                translation_limit_max=self.read_vector3(),
-                rotation_limit_min=self.read_vector3(),
-                rotation_limit_max=self.read_vector3(),
-                spring_constant_translation=self.read_vector3(),
-                spring_constant_rotation=self.read_vector3())
+                name=common.truncate_zero(values[0]),
+                rigidbody_index_a=values[1],
+                rigidbody_index_b=values[2],
+                position=v[0],
+                rotation=v[1],
+                translation_limit_min=v[2],
+                translation_limit_max=v[3],
+                rotation_limit_min=v[4],
+                rotation_limit_max=v[5],
+                spring_constant_translation=v[6],
+                spring_constant_rotation=v[7])
+
+    def skip_ik_list(self, count):
+        for _ in range(count):
+            self.skip(4)
+            length=self.read_uint(1)
+            self.skip(6+2*length)
+
+    def skip_morphs(self, count):
+        """
+        returns the count of the morphs without english names
+        """
+        base_count=0
+        for _ in range(count):
+            if self.read_text(20)==b'base':
+                base_count+=1
+            self.skip(1+pmd.MORPH_OFFSET_STRUCT.size*self.read_uint(4))
+        return base_count
+
 
+# sections of the model in the file order
+SECTIONS=['vertices', 'indices', 'materials', 'bones', 'ik_list', 'morphs',
+        'morph_indices', 'bone_group_list', 'bone_display_list',
+        'toon_textures', 'rigidbodies', 'joints']
 
 
-def __read(reader, model):
+def __read(reader, model, array, sections):
+    def is_wanted(name):
+        return sections is None or name in sections
+
     # model info
     model.name=reader.read_text(20)
     model.comment=reader.read_text(256) 
 
     # model data
-    model.vertices=[reader.read_vertex()
-            for _ in range(reader.read_uint(4))]
-    model.indices=[reader.read_uint(2)
-            for _ in range(reader.read_uint(4))]
-    model.materials=[reader.read_material()
-            for _ in range(reader.read_uint(4))]
-    model.bones=[reader.read_bone()
-            for _ in range(reader.read_uint(2))]
-    model.ik_list=[reader.read_ik()
-            for _ in range(reader.read_uint(2))]
-    model.morphs=[reader.read_morph()
-            for _ in range(reader.read_uint(2))]
-    model.morph_indices=[reader.read_uint(2)
-            for _ in range(reader.read_uint(1))]
-    model.bone_group_list=[pmd.BoneGroup(reader.read_text(50))
-            for _ in range(reader.read_uint(1))]
-    model.bone_display_list=[(reader.read_uint(2), reader.read_uint(1))
-            for _i in range(reader.read_uint(4))]
+    count=reader.read_uint(4)
+    if not is_wanted('vertices'):
+        reader.skip(pmd.VERTEX_STRUCT.size*count)
+    elif array:
+        model.vertices=reader.read_vertex_buffer(count)
+    else:
+        model.vertices=[reader.read_vertex() for _ in range(count)]
+    count=reader.read_uint(4)
+    if not is_wanted('indices'):
+        reader.skip(2*count)
+    elif array:
+        model.indices=reader.read_index_array(count)
+    else:
+        model.indices=list(reader.unpack_tuple("<%dH" % count, 2*count))
+    count=reader.read_uint(4)
+    if is_wanted('materials'):
+        model.materials=[reader.read_material() for _ in range(count)]
+    else:
+        reader.skip(pmd.MATERIAL_STRUCT.size*count)
+    bone_count=reader.read_uint(2)
+    if is_wanted('bones'):
+        model.bones=[reader.read_bone() for _ in range(bone_count)]
+    else:
+        reader.skip(pmd.BONE_STRUCT.size*bone_count)
+    count=reader.read_uint(2)
+    if is_wanted('ik_list'):
+        model.ik_list=[reader.read_ik() for _ in range(count)]
+    else:
+        reader.skip_ik_list(count)
+    morph_count=reader.read_uint(2)
+    if is_wanted('morphs'):
+        model.morphs=[reader.read_morph() for _ in range(morph_count)]
+        base_count=len([m for m in model.morphs if m.name==b'base'])
+    else:
+        base_count=reader.skip_morphs(morph_count)
+    count=reader.read_uint(1)
+    if is_wanted('morph_indices'):
+        model.morph_indices=list(reader.unpack_tuple("<%dH" % count, 2*count))
+    else:
+        reader.skip(2*count)
+    group_count=reader.read_uint(1)
+    if is_wanted('bone_group_list'):
+        model.bone_group_list=[pmd.BoneGroup(reader.read_text(50))
+                for _ in range(group_count)]
+    else:
+        reader.skip(50*group_count)
+    count=reader.read_uint(4)
+    if is_wanted('bone_display_list'):
+        model.bone_display_list=[(reader.read_uint(2), reader.read_uint(1))
+                for _i in range(count)]
+    else:
+        reader.skip(3*count)
 
     if reader.is_end():
         # EOF
@@ -146,14 +234,23 @@ def __read(reader, model):
         #return True
         model.english_name=reader.read_text(20)
         model.english_comment=reader.read_text(256)
-        for bone in model.bones:
-            bone.english_name=reader.read_text(20)
-        for morph in model.morphs:
-            if morph.name==b'base':
-                continue
-            morph.english_name=reader.read_text(20)
-        for g in model.bone_group_list:
-            g.english_name=reader.read_text(50)
+        if is_wanted('bones'):
+            for bone in model.bones:
+                bone.english_name=reader.read_text(20)
+        else:
+            reader.skip(20*bone_count)
+        if is_wanted('morphs'):
+            for morph in model.morphs:
+                if morph.name==b'base':
+                    continue
+                morph.english_name=reader.read_text(20)
+        else:
+            reader.skip(20*(morph_count-base_count))
+        if is_wanted('bone_group_list'):
+            for g in model.bone_group_list:
+                g.english_name=reader.read_text(50)
+        else:
+            reader.skip(50*group_count)
 
 
     ############################################################
@@ -162,8 +259,11 @@ def __read(reader, model):
     if reader.is_end():
         # EOF
         return True
-    model.toon_textures=[reader.read_text(100)
-            for _ in range(10)]
+    if is_wanted('toon_textures'):
+        model.toon_textures=[reader.read_text(100)
+                for _ in range(10)]
+    else:
+        reader.skip(1000)
 
     ############################################################
     # extend2: rigidbodies and joints
@@ -172,21 +272,36 @@ def __read(reader, model):
         # EOF
         return True
 
-    model.rigidbodies=[reader.read_rigidbody()
-            for _ in range(reader.read_uint(4))]
-    model.joints=[reader.read_joint()
-            for _ in range(reader.read_uint(4))]
+    count=reader.read_uint(4)
+    if is_wanted('rigidbodies'):
+        model.rigidbodies=[reader.read_rigidbody() for _ in range(count)]
+    else:
+        reader.skip(pmd.RIGIDBODY_STRUCT.size*count)
+    count=reader.read_uint(4)
+    if is_wanted('joints'):
+        model.joints=[reader.read_joint() for _ in range(count)]
+    else:
+        reader.skip(pmd.JOINT_STRUCT.size*count)
 
     return True
 
 
-def read_from_file(path):
+def read_from_file(path, mmap=False, array=False, sections=None):
     """
     read from file path, then return the pymeshio.pmd.Model.
 
     :Parameters:
       path
         file path
+      mmap
+        parse from a read only mmap instead of reading
+        all bytes of the file to memory.
+      array
+        decode vertices to a pmd.VertexBuffer and indices to a
+        numpy uint16 array(requires numpy).
+      sections
+        names in SECTIONS to decode. other sections are skipped
+        and left empty. None decodes all.
 
     >>> import pymeshio.pmd.reader
     >>> m=pymeshio.pmd.reader.read_from_file('resources/初音ミクVer2.pmd')
@@ -194,18 +309,26 @@ def read_from_file(path):
     <pmd-2.0 "Miku Hatsune" 12354vertices>
 
     """
-    pmd=read(io.BytesIO(common.readall(path)))
+    if mmap:
+        with common.open_mapped(path) as buf:
+            pmd=read_from_buffer(buf, array, sections)
+    else:
+        pmd=read_from_buffer(common.readall(path), array, sections)
     pmd.path=path
     return pmd
 
 
-def read(ios):
+def read(ios, array=False, sections=None):
     """
     read from ios, then return the pymeshio.pmd.Model.
 
     :Parameters:
       ios
         input stream (in io.IOBase)
+      array
+        see read_from_file
+      sections
+        see read_from_file
 
     >>> import pymeshio.pmd.reader
     >>> m=pymeshio.pmd.reader.read(io.open('resources/初音ミクVer2.pmd', 'rb'))
@@ -214,7 +337,29 @@ def read(ios):
 
     """
     assert(isinstance(ios, io.IOBase))
-    reader=common.BinaryReader(ios)
+    return read_from_buffer(ios.read(), array, sections)
+
+
+def read_from_buffer(buf, array=False, sections=None):
+    """
+    read from bytes-like buffer, then return the pymeshio.pmd.Model.
+
+    :Parameters:
+      buf
+        bytes, bytearray, memoryview or mmap.
+        parsed in place without copying.
+      array
+        see read_from_file
+      sections
+        see read_from_file
+    """
+    if array:
+        common.require_numpy("array mode")
+    if sections is not None:
+        unknown=set(sections).difference(SECTIONS)
+        if unknown:
+            raise ValueError("unknown sections: {0}".format(sorted(unknown)))
+    reader=common.BufferReader(memoryview(buf))
 
     # header
     signature=reader.unpack("3s", 3)
@@ -224,8 +369,8 @@ def read(ios):
     version=reader.read_float()
 
     model=pmd.Model(version)
-    reader=Reader(reader.ios, version)
-    if(__read(reader, model)):
+    reader=Reader(reader.buf, version, reader.pos)
+    if(__read(reader, model, array, sections)):
         # check eof
         if not reader.is_end():
             #print("can not reach eof.")
@@ -249,3 +394,91 @@ def read(ios):
 
         return model
 
+
+def probe(path):
+    """
+    read the header and the section table of the pmd file,
+    then return the common.Probe.
+    sections are skipped by fixed strides, not decoded.
+
+    :Parameters:
+      path
+        file path
+    """
+    with common.open_mapped(path) as buf:
+        probe=probe_from_buffer(buf)
+    probe.path=path
+    return probe
+
+
+def probe_from_buffer(buf):
+    """
+    probe from bytes-like buffer.
+    """
+    reader=common.BufferReader(memoryview(buf))
+    signature=reader.unpack("3s", 3)
+    if signature!=b"Pmd":
+        raise common.ParseException(
+                "invalid signature: {0}".format(signature))
+    version=reader.read_float()
+    reader=Reader(reader.buf, version, reader.pos)
+
+    probe=common.Probe('pmd', version)
+    probe.name=reader.read_text(20)
+    probe.comment=reader.read_text(256)
+    def add_section(name, count_size, stride):
+        offset=reader.pos
+        count=reader.read_uint(count_size)
+        reader.skip(stride*count)
+        probe.sections.append(
+                common.Section(name, offset, reader.pos-offset, count))
+        return count
+
+    add_section('vertices', 4, pmd.VERTEX_STRUCT.size)
+    add_section('indices', 4, 2)
+    # materials for the texture names
+    offset=reader.pos
+    materials=[reader.read_material() for _ in range(reader.read_uint(4))]
+    probe.sections.append(common.Section('materials',
+        offset, reader.pos-offset, len(materials)))
+    for m in materials:
+        if m.texture_file and m.texture_file not in probe.textures:
+            probe.textures.append(m.texture_file)
+    bone_count=add_section('bones', 2, pmd.BONE_STRUCT.size)
+    offset=reader.pos
+    count=reader.read_uint(2)
+    reader.skip_ik_list(count)
+    probe.sections.append(common.Section('ik_list',
+        offset, reader.pos-offset, count))
+    offset=reader.pos
+    morph_count=reader.read_uint(2)
+    base_count=reader.skip_morphs(morph_count)
+    probe.sections.append(common.Section('morphs',
+        offset, reader.pos-offset, morph_count))
+    add_section('morph_indices', 1, 2)
+    group_count=add_section('bone_group_list', 1, 50)
+    add_section('bone_display_list', 4, 3)
+
+    if not reader.is_end():
+        # extend1: english names
+        offset=reader.pos
+        if reader.read_uint(1)==1:
+            probe.english_name=reader.read_text(20)
+            probe.english_comment=reader.read_text(256)
+            reader.skip(20*bone_count+20*(morph_count-base_count)
+                    +50*group_count)
+        probe.sections.append(common.Section('english',
+            offset, reader.pos-offset, 1))
+    if not reader.is_end():
+        # extend2: toon_textures
+        probe.sections.append(common.Section('toon_textures',
+            reader.pos, 1000, 10))
+        reader.skip(1000)
+    if not reader.is_end():
+        # extend2: rigidbodies and joints
+        add_section('rigidbodies', 4, pmd.RIGIDBODY_STRUCT.size)
+        add_section('joints', 4, pmd.JOINT_STRUCT.size)
+    if reader.pos>reader.end:
+        raise common.ParseException("section over eof")
+    reader.release()
+    return probe
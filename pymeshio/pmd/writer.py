@@ -4,25 +4,39 @@ pmd writer
 """
 import io
 import struct
+import array
 from .. import common
 from .. import pmd
+try:
+    import numpy
+except ImportError:
+    numpy=None
 
 
-class Writer(common.BinaryWriter):
+class Writer(common.BufferWriter):
+    """pmd writer
+
+    the whole model is serialized in memory, then written by flush.
+    """
     def write_veritices(self, vertices):
         self.write_uint(len(vertices), 4)
+        self.reserve(pmd.VERTEX_STRUCT.size*len(vertices))
+        if isinstance(vertices, pmd.VertexBuffer):
+            self.write(vertices.tobytes())
+            return
         for v in vertices:
-            self.write_vector3(v.pos)
-            self.write_vector3(v.normal)
-            self.write_vector2(v.uv)
-            self.write_uint(v.bone0, 2)
-            self.write_uint(v.bone1, 2)
-            self.write_uint(v.weight0, 1)
-            self.write_uint(v.edge_flag, 1)
+            self.write_struct(pmd.VERTEX_STRUCT,
+                    v.pos.x, v.pos.y, v.pos.z,
+                    v.normal.x, v.normal.y, v.normal.z,
+                    v.uv.x, v.uv.y,
+                    v.bone0, v.bone1, v.weight0, v.edge_flag)
 
     def write_indices(self, indices):
         self.write_uint(len(indices), 4)
-        self.ios.write(struct.pack("=%dH" % len(indices), *indices))
+        if numpy and isinstance(indices, numpy.ndarray):
+            self.write(indices.astype('<u2').tobytes())
+            return
+        self.write_array(array.array('H', indices))
 
     def write_materials(self, materials):
         self.write_uint(len(materials), 4)
@@ -57,7 +71,7 @@ class Writer(common.BinaryWriter):
             self.write_uint(len(ik.children), 1)
             self.write_uint(ik.iterations, 2)
             self.write_float(ik.weight)
-            self.ios.write(struct.pack("=%dH" % len(ik.children), *ik.children))
+            self.write_array(array.array('H', ik.children))
 
     def write_morphs(self, morphs):
         self.write_uint(len(morphs), 2)
@@ -71,7 +85,7 @@ class Writer(common.BinaryWriter):
 
     def write_morph_indices(self, morph_indices):
         self.write_uint(len(morph_indices), 1)
-        self.ios.write(struct.pack("=%dH" % len(morph_indices), *morph_indices))
+        self.write_array(array.array('H', morph_indices))
 
     def write_bone_group_list(self, bone_group_list):
         self.write_uint(len(bone_group_list), 1)
@@ -118,21 +132,23 @@ class Writer(common.BinaryWriter):
             self.write_vector3(j.spring_constant_rotation)
 
 
-def write(ios, model):
+def serialize(model, ios=None):
     """
-    write model to ios.
+    serialize model in memory without any I/O.
+
+    returns the Writer. writer.size is the byte size of the file and
+    writer.flush writes it to ios.
 
     :Parameters:
-        ios
-            output stream (in io.IOBase)
         model
             pmd model
+        ios
+            output stream for flush
 
     >>> import pymeshio.pmd.writer
-    >>> pymeshio.pmd.writer.write(io.open('out.pmd', 'wb'), pmd_model)
+    >>> print(pymeshio.pmd.writer.serialize(pmd_model).size)
 
     """
-    assert(isinstance(ios, io.IOBase))
     assert(isinstance(model, pmd.Model))
     writer=Writer(ios)
     writer.write_bytes(b"Pmd")
@@ -164,5 +180,24 @@ def write(ios, model):
         writer.write_bytes(toon_texture, 100)
     writer.write_rigidbodies(model.rigidbodies)
     writer.write_joints(model.joints)
+    return writer
+
+
+def write(ios, model):
+    """
+    write model to ios.
+
+    :Parameters:
+        ios
+            output stream (in io.IOBase)
+        model
+            pmd model
+
+    >>> import pymeshio.pmd.writer
+    >>> pymeshio.pmd.writer.write(io.open('out.pmd', 'wb'), pmd_model)
+
+    """
+    assert(isinstance(ios, io.IOBase))
+    serialize(model, ios).flush()
     return True
 
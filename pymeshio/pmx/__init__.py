@@ -27,6 +27,10 @@ import io
 import os
 import struct
 from .. import common
+try:
+    import numpy
+except ImportError:
+    numpy=None
 
 
 
@@ -361,6 +365,10 @@ class Material(common.Diff):
             ))
 
 
+DEFORM_BDEF1=0
+DEFORM_BDEF2=1
+DEFORM_BDEF4=2
+DEFORM_SDEF=3
 class Bdef1(common.Diff):
     """bone deform. use a weight
 
@@ -552,6 +560,243 @@ class Vertex(common.Diff):
         self._diff(rhs, "edge_factor")
 
 
+class VertexBuffer(object):
+    """
+    =================
+    pmx vertex buffer
+    =================
+    columnar(struct of arrays) vertices. requires numpy.
+
+    list like. vertices[i] returns a Vertex.
+    unused bone index columns are -1 and unused weights are 0.
+
+    :IVariables:
+        positions
+            float32 (N, 3)
+        normals
+            float32 (N, 3)
+        uvs
+            float32 (N, 2)
+        edge_factors
+            float32 (N,)
+        deform_types
+            int8 (N,). DEFORM_BDEF1, DEFORM_BDEF2, DEFORM_BDEF4 or DEFORM_SDEF
+        bone_indices
+            int32 (N, 4)
+        weights
+            float32 (N, 4)
+        sdef_c
+            float32 (N, 3). used by DEFORM_SDEF
+        sdef_r0
+            float32 (N, 3). used by DEFORM_SDEF
+        sdef_r1
+            float32 (N, 3). used by DEFORM_SDEF
+    """
+    __slots__=[
+            'positions',
+            'normals',
+            'uvs',
+            'edge_factors',
+            'deform_types',
+            'bone_indices',
+            'weights',
+            'sdef_c',
+            'sdef_r0',
+            'sdef_r1',
+            ]
+    def __init__(self, count=0):
+        common.require_numpy("pmx.VertexBuffer")
+        self.positions=numpy.zeros((count, 3), numpy.float32)
+        self.normals=numpy.zeros((count, 3), numpy.float32)
+        self.uvs=numpy.zeros((count, 2), numpy.float32)
+        self.edge_factors=numpy.zeros(count, numpy.float32)
+        self.deform_types=numpy.zeros(count, numpy.int8)
+        self.bone_indices=numpy.full((count, 4), -1, numpy.int32)
+        self.weights=numpy.zeros((count, 4), numpy.float32)
+        self.sdef_c=numpy.zeros((count, 3), numpy.float32)
+        self.sdef_r0=numpy.zeros((count, 3), numpy.float32)
+        self.sdef_r1=numpy.zeros((count, 3), numpy.float32)
+
+    @staticmethod
+    def from_vertices(vertices):
+        """
+        build from a list of Vertex.
+        """
+        vb=VertexBuffer(len(vertices))
+        for i, v in enumerate(vertices):
+            vb.positions[i]=v.position.to_tuple()
+            vb.normals[i]=v.normal.to_tuple()
+            vb.uvs[i]=v.uv.to_tuple()
+            vb.edge_factors[i]=v.edge_factor
+            d=v.deform
+            if isinstance(d, Bdef1):
+                vb.deform_types[i]=DEFORM_BDEF1
+                vb.bone_indices[i, 0]=d.index0
+                vb.weights[i, 0]=1.0
+            elif isinstance(d, Bdef2):
+                vb.deform_types[i]=DEFORM_BDEF2
+                vb.bone_indices[i, :2]=(d.index0, d.index1)
+                vb.weights[i, :2]=(d.weight0, 1.0-d.weight0)
+            elif isinstance(d, Bdef4):
+                vb.deform_types[i]=DEFORM_BDEF4
+                vb.bone_indices[i]=(d.index0, d.index1, d.index2, d.index3)
+                vb.weights[i]=(d.weight0, d.weight1, d.weight2, d.weight3)
+            elif isinstance(d, Sdef):
+                vb.deform_types[i]=DEFORM_SDEF
+                vb.bone_indices[i, :2]=(d.index0, d.index1)
+                vb.weights[i, :2]=(d.weight0, 1.0-d.weight0)
+                vb.sdef_c[i]=d.sdef_c.to_tuple()
+                vb.sdef_r0[i]=d.sdef_r0.to_tuple()
+                vb.sdef_r1[i]=d.sdef_r1.to_tuple()
+            else:
+                raise ValueError("unknown deform: {0}".format(d))
+        return vb
+
+    @staticmethod
+    def concatenate(buffers):
+        """
+        join VertexBuffers in order.
+        """
+        vb=VertexBuffer()
+        for name in VertexBuffer.__slots__:
+            setattr(vb, name, numpy.concatenate(
+                [getattr(b, name) for b in buffers]))
+        return vb
+
+    def to_vertices(self):
+        """
+        build a list of Vertex.
+        """
+        return [self[i] for i in range(len(self))]
+
+    def __str__(self):
+        return "<pmx.VertexBuffer {0} vertices>".format(len(self))
+
+    def __len__(self):
+        return len(self.positions)
+
+    def get_deform(self, i):
+        deform_type=self.deform_types[i]
+        indices=self.bone_indices[i].tolist()
+        weights=self.weights[i].tolist()
+        if deform_type==DEFORM_BDEF1:
+            return Bdef1(indices[0])
+        elif deform_type==DEFORM_BDEF2:
+            return Bdef2(indices[0], indices[1], weights[0])
+        elif deform_type==DEFORM_BDEF4:
+            return Bdef4(*(indices+weights))
+        elif deform_type==DEFORM_SDEF:
+            return Sdef(indices[0], indices[1], weights[0],
+                    common.Vector3(*self.sdef_c[i].tolist()),
+                    common.Vector3(*self.sdef_r0[i].tolist()),
+                    common.Vector3(*self.sdef_r1[i].tolist()))
+        else:
+            raise ValueError("unknown deform type: {0}".format(deform_type))
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            vb=VertexBuffer()
+            for name in self.__slots__:
+                setattr(vb, name, getattr(self, name)[key])
+            return vb
+        if key<0:
+            key+=len(self)
+        if key<0 or key>=len(self):
+            raise IndexError(key)
+        return Vertex(
+                common.Vector3(*self.positions[key].tolist()),
+                common.Vector3(*self.normals[key].tolist()),
+                common.Vector2(*self.uvs[key].tolist()),
+                self.get_deform(key),
+                float(self.edge_factors[key]))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, rhs):
+        if not isinstance(rhs, VertexBuffer):
+            return common.equal_sequence(self, rhs)
+        if len(self)!=len(rhs):
+            return False
+        for name in self.__slots__:
+            if not numpy.allclose(getattr(self, name), getattr(rhs, name),
+                    rtol=0, atol=1e-5):
+                return False
+        return True
+
+    def __ne__(self, rhs):
+        return not self.__eq__(rhs)
+
+
+# vertex index items. 1 and 2 byte indices are unsigned,
+# 4 byte indices are signed.
+VERTEX_INDEX_TYPECODES={1: 'B', 2: 'H', 4: 'i'}
+VERTEX_INDEX_DTYPES={1: '<u1', 2: '<u2', 4: '<i4'}
+
+
+def get_deform_size(deform_type, bone_index_size):
+    """
+    byte size of the deform block after the deform type byte.
+    """
+    if deform_type==DEFORM_BDEF1:
+        return bone_index_size
+    elif deform_type==DEFORM_BDEF2:
+        return bone_index_size*2+4
+    elif deform_type==DEFORM_BDEF4:
+        return bone_index_size*4+16
+    elif deform_type==DEFORM_SDEF:
+        return bone_index_size*2+4+36
+    else:
+        raise ValueError("unknown deform type: {0}".format(deform_type))
+
+
+def get_vertex_struct(deform_type, bone_index_size):
+    """
+    struct.Struct of a whole vertex record of the deform type.
+    """
+    bone={1: 'b', 2: 'h', 4: 'i'}[bone_index_size]
+    if deform_type==DEFORM_BDEF1:
+        deform=bone
+    elif deform_type==DEFORM_BDEF2:
+        deform="2{0}f".format(bone)
+    elif deform_type==DEFORM_BDEF4:
+        deform="4{0}4f".format(bone)
+    elif deform_type==DEFORM_SDEF:
+        deform="2{0}10f".format(bone)
+    else:
+        raise ValueError("unknown deform type: {0}".format(deform_type))
+    return struct.Struct("<8fb{0}f".format(deform))
+
+
+def get_vertex_dtype(deform_type, bone_index_size):
+    """
+    numpy structured dtype of a whole vertex record of the deform type.
+    """
+    bone='<i{0}'.format(bone_index_size)
+    fields=[
+            ('position', '<f4', (3,)),
+            ('normal', '<f4', (3,)),
+            ('uv', '<f4', (2,)),
+            ('deform_type', 'i1'),
+            ]
+    if deform_type==DEFORM_BDEF1:
+        fields+=[('bone_indices', bone, (1,))]
+    elif deform_type==DEFORM_BDEF2:
+        fields+=[('bone_indices', bone, (2,)), ('weight0', '<f4')]
+    elif deform_type==DEFORM_BDEF4:
+        fields+=[('bone_indices', bone, (4,)), ('weights', '<f4', (4,))]
+    elif deform_type==DEFORM_SDEF:
+        fields+=[('bone_indices', bone, (2,)), ('weight0', '<f4'),
+                ('sdef_c', '<f4', (3,)),
+                ('sdef_r0', '<f4', (3,)),
+                ('sdef_r1', '<f4', (3,))]
+    else:
+        raise ValueError("unknown deform type: {0}".format(deform_type))
+    fields+=[('edge_factor', '<f4')]
+    return numpy.dtype(fields)
+
+
 class Morph(common.Diff):
     """pmx morph
 
@@ -970,7 +1215,7 @@ class Model(common.Diff):
         english_comment 
             comment
         vertices
-            vertex list
+            vertex list or VertexBuffer
         textures
             texture list
         materials
@@ -1035,7 +1280,7 @@ class Model(common.Diff):
                 and self.comment==rhs.comment
                 and self.english_comment==rhs.english_comment
                 and self.vertices==rhs.vertices
-                and self.indices==rhs.indices
+                and common.equal_sequence(self.indices, rhs.indices)
                 and self.textures==rhs.textures
                 and self.materials==rhs.materials
                 and self.bones==rhs.bones
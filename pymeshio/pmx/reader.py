@@ -3,14 +3,19 @@
 pmx reader
 """
 import io
+import array
 from .. import common
 from .. import pmx
+try:
+    import numpy
+except ImportError:
+    numpy=None
 
 
-class Reader(common.BinaryReader):
+class Reader(common.BufferReader):
     """pmx reader
     """
-    def __init__(self, ios,
+    def __init__(self, buf,
             text_encoding,
             extended_uv,
             vertex_index_size,
@@ -18,9 +23,10 @@ class Reader(common.BinaryReader):
             material_index_size,
             bone_index_size,
             morph_index_size,
-            rigidbody_index_size
+            rigidbody_index_size,
+            pos=0
             ):
-        super(Reader, self).__init__(ios)
+        super(Reader, self).__init__(buf, pos)
         self.read_text=self.get_read_text(text_encoding)
         if extended_uv>0:
             raise common.ParseException(
@@ -34,6 +40,12 @@ class Reader(common.BinaryReader):
         self.read_bone_index=lambda : self.read_int(bone_index_size)
         self.read_morph_index=lambda : self.read_int(morph_index_size)
         self.read_rigidbody_index=lambda : self.read_int(rigidbody_index_size)
+        self.vertex_index_size=vertex_index_size
+        self.texture_index_size=texture_index_size
+        self.material_index_size=material_index_size
+        self.bone_index_size=bone_index_size
+        self.morph_index_size=morph_index_size
+        self.rigidbody_index_size=rigidbody_index_size
 
     def __str__(self):
         return '<pmx.Reader>'
@@ -42,12 +54,12 @@ class Reader(common.BinaryReader):
         if text_encoding==0:
             def read_text():
                 size=self.read_int(4)
-                return self.unpack("{0}s".format(size), size).decode("utf-16-le")
+                return self.read_bytes(size).decode("utf-16-le")
             return read_text
         elif text_encoding==1:
             def read_text():
                 size=self.read_int(4)
-                return self.unpack("{0}s".format(size), size).decode("UTF8")
+                return self.read_bytes(size).decode("UTF8")
             return read_text
         else:
             print("unknown text encoding", text_encoding)
@@ -61,6 +73,300 @@ class Reader(common.BinaryReader):
                 self.read_float() # edge factor
                 )
 
+    def scan_vertices(self, count):
+        """
+        find the offset and the deform type of each vertex record
+        without decoding. the cursor moves to the end of the section.
+
+        returns (offsets, deform_types) as array.array.
+        raise common.ParseException for malformed data.
+        """
+        buf=self.buf
+        sizes=[32+1+pmx.get_deform_size(t, self.bone_index_size)+4
+                for t in range(4)]
+        offsets=array.array('q', [0])*count
+        deform_types=array.array('b', [0])*count
+        pos=self.pos
+        try:
+            for i in range(count):
+                deform_type=buf[pos+32]
+                offsets[i]=pos
+                deform_types[i]=deform_type
+                pos+=sizes[deform_type]
+        except (IndexError, TypeError):
+            # deform_type>3 or out of the buffer
+            raise common.ParseException(
+                    "invalid vertex at {0}".format(pos))
+        if pos>self.end:
+            raise common.ParseException("vertex section over eof")
+        self.pos=pos
+        return offsets, deform_types
+
+    def read_vertex_buffer(self, count):
+        """
+        decode the vertex section to pmx.VertexBuffer in bulk.
+
+        a scan pass finds the records, then the records of each
+        deform type are gathered to the columns at once.
+        falls back to read_vertex for malformed data.
+        """
+        start=self.pos
+        try:
+            offsets, deform_types=self.scan_vertices(count)
+        except common.ParseException:
+            self.pos=start
+            return pmx.VertexBuffer.from_vertices(
+                    [self.read_vertex() for _ in range(count)])
+        vertices=pmx.VertexBuffer(count)
+        offsets=numpy.frombuffer(offsets, numpy.int64)
+        deform_types=numpy.frombuffer(deform_types, numpy.int8)
+        vertices.deform_types[:]=deform_types
+        self.gather_vertices(vertices, offsets, deform_types)
+        return vertices
+
+    def gather_vertices(self, vertices, offsets, deform_types,
+            chunk_size=65536):
+        """
+        decode the records at offsets into vertices(pmx.VertexBuffer).
+        """
+        u8=numpy.frombuffer(self.buf, numpy.uint8)
+        for deform_type in range(4):
+            index=numpy.nonzero(deform_types==deform_type)[0]
+            if len(index)==0:
+                continue
+            dtype=pmx.get_vertex_dtype(deform_type, self.bone_index_size)
+            columns=numpy.arange(dtype.itemsize)
+            for begin in range(0, len(index), chunk_size):
+                i=index[begin:begin+chunk_size]
+                records=u8[offsets[i][:, None]+columns].view(dtype)[:, 0]
+                vertices.positions[i]=records['position']
+                vertices.normals[i]=records['normal']
+                vertices.uvs[i]=records['uv']
+                vertices.edge_factors[i]=records['edge_factor']
+                bone_count=records['bone_indices'].shape[1]
+                vertices.bone_indices[i, :bone_count]=records['bone_indices']
+                if deform_type==pmx.DEFORM_BDEF1:
+                    vertices.weights[i, 0]=1.0
+                elif deform_type==pmx.DEFORM_BDEF4:
+                    vertices.weights[i]=records['weights']
+                else:
+                    vertices.weights[i, 0]=records['weight0']
+                    vertices.weights[i, 1]=1.0-records['weight0']
+                if deform_type==pmx.DEFORM_SDEF:
+                    vertices.sdef_c[i]=records['sdef_c']
+                    vertices.sdef_r0[i]=records['sdef_r0']
+                    vertices.sdef_r1[i]=records['sdef_r1']
+
+    def read_section(self, name, count, array=False):
+        """
+        decode the items of the section.
+        """
+        if name=='vertices':
+            if array:
+                return self.read_vertex_buffer(count)
+            return [self.read_vertex() for _ in range(count)]
+        elif name=='indices':
+            if array:
+                return self.read_index_array(count)
+            return self.read_indices(count).tolist()
+        read_item={
+                'textures': self.read_text,
+                'materials': self.read_material,
+                'bones': self.read_bone,
+                'morphs': self.read_morgh,
+                'display_slots': self.read_display_slot,
+                'rigidbodies': self.read_rigidbody,
+                'joints': self.read_joint,
+                }[name]
+        return [read_item() for _ in range(count)]
+
+    def skip_vertices(self, count):
+        """
+        move to the end of the vertex section reading only deform types.
+        """
+        buf=self.buf
+        sizes=[32+1+pmx.get_deform_size(t, self.bone_index_size)+4
+                for t in range(4)]
+        pos=self.pos
+        try:
+            for _ in range(count):
+                pos+=sizes[buf[pos+32]]
+        except (IndexError, TypeError):
+            raise common.ParseException(
+                    "invalid vertex at {0}".format(pos))
+        self.pos=pos
+
+    def scan_vertex_ranges(self, count, chunk_size):
+        """
+        split the vertex section to (position, count) ranges of
+        chunk_size vertices. the cursor moves to the end of the section.
+        """
+        ranges=[]
+        for begin in range(0, count, chunk_size):
+            n=min(chunk_size, count-begin)
+            ranges.append((self.pos, n))
+            self.skip_vertices(n)
+        return ranges
+
+    def scan_morph_ranges(self, count, chunk_size):
+        """
+        split the morph section to (position, count) ranges of about
+        chunk_size morph offsets. the cursor moves to the end of the section.
+        """
+        ranges=[]
+        begin=self.pos
+        n=0
+        offset_count=0
+        for _ in range(count):
+            offset_count+=self.skip_morph()
+            n+=1
+            if offset_count>=chunk_size:
+                ranges.append((begin, n))
+                begin=self.pos
+                n=0
+                offset_count=0
+        if n:
+            ranges.append((begin, n))
+        return ranges
+
+    def skip_text(self):
+        self.skip(self.read_int(4))
+
+    def skip_material(self):
+        self.skip_text()
+        self.skip_text()
+        # colors, flag and edge
+        self.skip(65)
+        self.skip(self.texture_index_size*2+1)
+        toon_sharing_flag=self.read_int(1)
+        self.skip(self.texture_index_size if toon_sharing_flag==0 else 1)
+        self.skip_text()
+        self.skip(4)
+
+    def skip_bone(self):
+        self.skip_text()
+        self.skip_text()
+        # position, parent and layer
+        self.skip(12+self.bone_index_size+4)
+        flag=self.read_int(2)
+        self.skip(self.bone_index_size if flag & pmx.BONEFLAG_TAILPOS_IS_BONE
+                else 12)
+        if flag & (pmx.BONEFLAG_IS_EXTERNAL_ROTATION
+                | pmx.BONEFLAG_IS_EXTERNAL_TRANSLATION):
+            self.skip(self.bone_index_size+4)
+        if flag & pmx.BONEFLAG_HAS_FIXED_AXIS:
+            self.skip(12)
+        if flag & pmx.BONEFLAG_HAS_LOCAL_COORDINATE:
+            self.skip(24)
+        if flag & pmx.BONEFLAG_IS_EXTERNAL_PARENT_DEFORM:
+            self.skip(4)
+        if flag & pmx.BONEFLAG_IS_IK:
+            # target, loop and limit radian
+            self.skip(self.bone_index_size+4+4)
+            for _ in range(self.read_int(4)):
+                self.skip(self.bone_index_size)
+                limit_angle=self.read_int(1)
+                if limit_angle==1:
+                    self.skip(24)
+                elif limit_angle!=0:
+                    raise common.ParseException(
+                            "invalid ik link limit_angle: {0}".format(
+                        limit_angle))
+
+    def skip_morph(self):
+        """
+        returns the offset count of the morph
+        """
+        self.skip_text()
+        self.skip_text()
+        self.skip(1)
+        morph_type=self.read_int(1)
+        offset_size=self.read_int(4)
+        if morph_type==0:
+            # group
+            stride=self.morph_index_size+4
+        elif morph_type==1:
+            # vertex
+            stride=self.vertex_index_size+12
+        elif morph_type==2:
+            # bone
+            stride=self.bone_index_size+28
+        elif 3<=morph_type<=7:
+            # uv and extended uv
+            stride=self.vertex_index_size+16
+        elif morph_type==8:
+            # material
+            stride=self.material_index_size+113
+        else:
+            raise common.ParseException(
+                    "unknown morph type: {0}".format(morph_type))
+        self.skip(stride*offset_size)
+        return offset_size
+
+    def skip_display_slot(self):
+        self.skip_text()
+        self.skip_text()
+        self.skip(1)
+        for _ in range(self.read_int(4)):
+            display_type=self.read_int(1)
+            if display_type==0:
+                self.skip(self.bone_index_size)
+            elif display_type==1:
+                self.skip(self.morph_index_size)
+            else:
+                raise common.ParseException(
+                        "unknown display_type: {0}".format(display_type))
+
+    def skip_rigidbody(self):
+        self.skip_text()
+        self.skip_text()
+        self.skip(self.bone_index_size+61)
+
+    def skip_joint(self):
+        self.skip_text()
+        self.skip_text()
+        self.skip(1+self.rigidbody_index_size*2+96)
+
+    def skip_section(self, name, count):
+        """
+        move to the end of the section without decoding the items.
+        """
+        if name=='vertices':
+            self.skip_vertices(count)
+        elif name=='indices':
+            self.skip(self.vertex_index_size*count)
+        else:
+            skip_item={
+                    'textures': self.skip_text,
+                    'materials': self.skip_material,
+                    'bones': self.skip_bone,
+                    'morphs': self.skip_morph,
+                    'display_slots': self.skip_display_slot,
+                    'rigidbodies': self.skip_rigidbody,
+                    'joints': self.skip_joint,
+                    }[name]
+            for _ in range(count):
+                skip_item()
+        if self.pos>self.end:
+            raise common.ParseException(
+                    "{0} section over eof".format(name))
+
+    def read_indices(self, count):
+        """
+        read the index section at once as array.array.
+        """
+        return self.read_array(
+                pmx.VERTEX_INDEX_TYPECODES[self.vertex_index_size], count)
+
+    def read_index_array(self, count):
+        """
+        read the index section at once as numpy array(array mode).
+        """
+        dtype=pmx.VERTEX_INDEX_DTYPES[self.vertex_index_size]
+        indices=numpy.frombuffer(self.buf, dtype, count, self.pos)
+        self.pos+=self.vertex_index_size*count
+        return indices.copy()
+
     def read_deform(self):
         deform_type=self.read_int(1)
         if deform_type==0:
@@ -187,20 +493,33 @@ class Reader(common.BinaryReader):
         return link
 
     def read_morgh(self):
+        morph, offset_size=self.read_morph_header()
+        read_offset=self.get_read_morph_offset(morph.morph_type)
+        offsets=[read_offset() for _ in range(offset_size)]
+        if morph.morph_type==8:
+            morph.data=offsets
+        else:
+            morph.offsets=offsets
+        return morph
+
+    def read_morph_header(self):
+        """
+        returns the morph without offsets and the offset count.
+        """
         name=self.read_text()
         english_name=self.read_text()
         panel=self.read_int(1)
         morph_type=self.read_int(1)
         offset_size=self.read_int(4)
-        morph=pmx.Morph(name, english_name, 
-                panel, morph_type)
+        return pmx.Morph(name, english_name, panel, morph_type), offset_size
+
+    def get_read_morph_offset(self, morph_type):
         if morph_type==0:
             # todo
             raise common.ParseException(
                     "not implemented GroupMorph")
         elif morph_type==1:
-            morph.offsets=[self.read_vertex_position_morph_offset() 
-                    for _ in range(offset_size)]
+            return self.read_vertex_position_morph_offset
         elif morph_type==2:
             # todo
             raise common.ParseException(
@@ -226,12 +545,10 @@ class Reader(common.BinaryReader):
             raise common.ParseException(
                     "not implemented extended UvMorph4")
         elif morph_type==8:
-            morph.data=[self.read_material_morph_data()
-                    for _ in range(offset_size)]
+            return self.read_material_morph_data
         else:
             raise common.ParseException(
                     "unknown morph type: {0}".format(morph_type))
-        return morph
 
     def read_vertex_position_morph_offset(self):
         return pmx.VertexMorphOffset(
@@ -304,41 +621,17 @@ class Reader(common.BinaryReader):
                 spring_constant_rotation=self.read_vector3())
 
 
-def read_from_file(path):
-    """
-    read from file path, then return the pmx.Model.
-
-    :Parameters:
-      path
-        file path
+# sections after the model info in the file order
+SECTIONS=['vertices', 'indices', 'textures', 'materials', 'bones',
+        'morphs', 'display_slots', 'rigidbodies', 'joints']
 
-    >>> import pmx.reader
-    >>> m=pmx.reader.read_from_file('resources/初音ミクVer2.pmx')
-    >>> print(m)
-    <pmx-2.0 "Miku Hatsune" 12354vertices>
 
+def __read_header(buf):
     """
-    pmx=read(io.BytesIO(common.readall(path)))
-    pmx.path=path
-    return pmx
-
-
-def read(ios):
-    """
-    read from ios, then return the pmx pmx.Model.
-
-    :Parameters:
-      ios
-        input stream (in io.IOBase)
-
-    >>> import pmx.reader
-    >>> m=pmx.reader.read(io.open('resources/初音ミクVer2.pmx', 'rb'))
-    >>> print(m)
-    <pmx-2.0 "Miku Hatsune" 12354vertices>
-
+    read the header, then return the version and the pmx reader
+    at the model info.
     """
-    assert(isinstance(ios, io.IOBase))
-    reader=common.BinaryReader(ios)
+    reader=common.BufferReader(memoryview(buf))
 
     # header
     signature=reader.unpack("4s", 4)
@@ -349,7 +642,6 @@ def read(ios):
     version=reader.read_float()
     if version!=2.0:
         print("unknown version", version)
-    model=pmx.Model(version)
 
     # flags
     flag_bytes=reader.read_int(1)
@@ -366,7 +658,7 @@ def read(ios):
     rigidbody_index_size=reader.read_int(1)
     
     # pmx custom reader
-    reader=Reader(reader.ios,
+    reader=Reader(reader.buf,
             text_encoding,
             extended_uv,
             vertex_index_size,
@@ -374,8 +666,87 @@ def read(ios):
             material_index_size,
             bone_index_size,
             morph_index_size,
-            rigidbody_index_size
+            rigidbody_index_size,
+            reader.pos
             )
+    return version, reader
+
+
+def read_from_file(path, mmap=False, array=False, sections=None):
+    """
+    read from file path, then return the pmx.Model.
+
+    :Parameters:
+      path
+        file path
+      mmap
+        parse from a read only mmap instead of reading
+        all bytes of the file to memory.
+      array
+        decode vertices to a pmx.VertexBuffer and indices to a
+        numpy array(requires numpy).
+      sections
+        names in SECTIONS to decode. other sections are skipped
+        and left empty. None decodes all.
+
+    >>> import pmx.reader
+    >>> m=pmx.reader.read_from_file('resources/初音ミクVer2.pmx')
+    >>> print(m)
+    <pmx-2.0 "Miku Hatsune" 12354vertices>
+
+    """
+    if mmap:
+        with common.open_mapped(path) as buf:
+            pmx=read_from_buffer(buf, array, sections)
+    else:
+        pmx=read_from_buffer(common.readall(path), array, sections)
+    pmx.path=path
+    return pmx
+
+
+def read(ios, array=False, sections=None):
+    """
+    read from ios, then return the pmx pmx.Model.
+
+    :Parameters:
+      ios
+        input stream (in io.IOBase)
+      array
+        see read_from_file
+      sections
+        see read_from_file
+
+    >>> import pmx.reader
+    >>> m=pmx.reader.read(io.open('resources/初音ミクVer2.pmx', 'rb'))
+    >>> print(m)
+    <pmx-2.0 "Miku Hatsune" 12354vertices>
+
+    """
+    assert(isinstance(ios, io.IOBase))
+    return read_from_buffer(ios.read(), array, sections)
+
+
+def read_from_buffer(buf, array=False, sections=None):
+    """
+    read from bytes-like buffer, then return the pmx.Model.
+
+    :Parameters:
+      buf
+        bytes, bytearray, memoryview or mmap.
+        parsed in place without copying.
+      array
+        see read_from_file
+      sections
+        see read_from_file
+    """
+    if array:
+        common.require_numpy("array mode")
+    if sections is not None:
+        unknown=set(sections).difference(SECTIONS)
+        if unknown:
+            raise ValueError("unknown sections: {0}".format(sorted(unknown)))
+    version, reader=__read_header(buf)
+    model=pmx.Model(version)
 
     # model info
     model.name = reader.read_text()
@@ -384,24 +755,186 @@ def read(ios):
     model.english_comment = reader.read_text()
 
     # model data
-    model.vertices=[reader.read_vertex() 
-            for _ in range(reader.read_int(4))]
-    model.indices=[reader.read_vertex_index() 
-            for _ in range(reader.read_int(4))]
-    model.textures=[reader.read_text() 
-            for _ in range(reader.read_int(4))]
-    model.materials=[reader.read_material() 
-            for _ in range(reader.read_int(4))]
-    model.bones=[reader.read_bone() 
-            for _ in range(reader.read_int(4))]
-    model.morphs=[reader.read_morgh() 
-            for _ in range(reader.read_int(4))]
-    model.display_slots=[reader.read_display_slot() 
-            for _ in range(reader.read_int(4))]
-    model.rigidbodies=[reader.read_rigidbody()
-            for _ in range(reader.read_int(4))]
-    model.joints=[reader.read_joint()
-            for _ in range(reader.read_int(4))]
+    for name in SECTIONS:
+        count=reader.read_int(4)
+        if sections is None or name in sections:
+            setattr(model, name, reader.read_section(name, count, array))
+        else:
+            reader.skip_section(name, count)
 
+    # the bound read functions make a reference cycle.
+    # release the view explicitly for the mmap to be closed.
+    reader.release()
     return model
 
+
+def __open_section(buf, target):
+    """
+    returns the reader at the first item of the target section
+    and the item count.
+    """
+    version, reader=__read_header(buf)
+    # model info
+    for _ in range(4):
+        reader.skip_text()
+    for name in SECTIONS:
+        count=reader.read_int(4)
+        if name==target:
+            return reader, count
+        reader.skip_section(name, count)
+
+
+def iter_vertices(path, chunk_size=None):
+    """
+    iterate the vertices of the pmx file without building the model.
+    the file is mapped, so that the memory usage does not depend on
+    the vertex count.
+
+    :Parameters:
+      path
+        file path
+      chunk_size
+        None yields each pmx.Vertex. otherwise yields pmx.VertexBuffer
+        of chunk_size vertices(requires numpy).
+    """
+    if chunk_size:
+        common.require_numpy("chunked iter_vertices")
+    with common.open_mapped(path) as buf:
+        reader, count=__open_section(buf, 'vertices')
+        try:
+            if chunk_size:
+                for begin in range(0, count, chunk_size):
+                    yield reader.read_vertex_buffer(
+                            min(chunk_size, count-begin))
+            else:
+                for _ in range(count):
+                    yield reader.read_vertex()
+        finally:
+            reader.release()
+
+
+def iter_morph_offsets(path):
+    """
+    iterate the morph offsets of the pmx file without building the model.
+
+    yields (morph, offset). morph is the pmx.Morph without offsets and
+    offset is a pmx.VertexMorphOffset or a pmx.MaterialMorphData.
+
+    :Parameters:
+      path
+        file path
+    """
+    with common.open_mapped(path) as buf:
+        reader, count=__open_section(buf, 'morphs')
+        try:
+            for _ in range(count):
+                morph, offset_size=reader.read_morph_header()
+                read_offset=reader.get_read_morph_offset(morph.morph_type)
+                for _ in range(offset_size):
+                    yield morph, read_offset()
+        finally:
+            reader.release()
+
+
+def read_section_range(path, name, pos, count, array=False):
+    """
+    decode count items of the section at pos of the file.
+    the worker of read_parallel.
+    """
+    with common.open_mapped(path) as buf:
+        version, reader=__read_header(buf)
+        reader.seek(pos)
+        items=reader.read_section(name, count, array)
+        reader.release()
+    return items
+
+
+def read_parallel(path, max_workers=None, chunk_size=65536):
+    """
+    read from file path decoding the vertex and the morph sections
+    in worker processes, then return the pmx.Model in array mode
+    (requires numpy).
+
+    the main process scans the section ranges, then each worker maps
+    the file and decodes a range of chunk_size vertices or about
+    chunk_size morph offsets. vertex chunks are returned as
+    pmx.VertexBuffer, so that little is pickled back.
+
+    :Parameters:
+      path
+        file path
+      max_workers
+        process count. None for the cpu count.
+      chunk_size
+        items per worker task
+    """
+    import concurrent.futures
+    common.require_numpy("read_parallel")
+    with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+        with common.open_mapped(path) as buf:
+            version, reader=__read_header(buf)
+            model=pmx.Model(version)
+            model.name = reader.read_text()
+            model.english_name = reader.read_text()
+            model.comment = reader.read_text()
+            model.english_comment = reader.read_text()
+            futures={}
+            for name in SECTIONS:
+                count=reader.read_int(4)
+                if name=='vertices':
+                    ranges=reader.scan_vertex_ranges(count, chunk_size)
+                elif name=='morphs':
+                    ranges=reader.scan_morph_ranges(count, chunk_size)
+                else:
+                    setattr(model, name,
+                            reader.read_section(name, count, True))
+                    continue
+                futures[name]=[executor.submit(read_section_range,
+                    path, name, pos, n, True) for pos, n in ranges]
+            reader.release()
+        chunks=[f.result() for f in futures['vertices']]
+        model.vertices=(pmx.VertexBuffer.concatenate(chunks)
+                if chunks else pmx.VertexBuffer())
+        model.morphs=[morph for f in futures['morphs']
+                for morph in f.result()]
+    model.path=path
+    return model
+
+
+def probe(path):
+    """
+    read the header and the section table of the pmx file,
+    then return the common.Probe.
+    vertices and morphs are skipped by small scans, not decoded.
+
+    :Parameters:
+      path
+        file path
+    """
+    with common.open_mapped(path) as buf:
+        probe=probe_from_buffer(buf)
+    probe.path=path
+    return probe
+
+
+def probe_from_buffer(buf):
+    """
+    probe from bytes-like buffer.
+    """
+    version, reader=__read_header(buf)
+    probe=common.Probe('pmx', version)
+    probe.name=reader.read_text()
+    probe.english_name=reader.read_text()
+    probe.comment=reader.read_text()
+    probe.english_comment=reader.read_text()
+    for name in SECTIONS:
+        offset=reader.pos
+        count=reader.read_int(4)
+        if name=='textures':
+            probe.textures=reader.read_section(name, count)
+        else:
+            reader.skip_section(name, count)
+        probe.sections.append(
+                common.Section(name, offset, reader.pos-offset, count))
+    reader.release()
+    return probe
@@ -4,11 +4,18 @@ pmx writer
 """
 import io
 import struct
+import array
 from .. import common
 from .. import pmx
+try:
+    import numpy
+except ImportError:
+    numpy=None
 
-class Writer(common.BinaryWriter):
+class Writer(common.BufferWriter):
     """pmx writer
+
+    the whole model is serialized in memory, then written by flush.
     """
     def __init__(self, ios,
             text_encoding, extended_uv,
@@ -31,9 +38,12 @@ class Writer(common.BinaryWriter):
                self.write_bytes(utf8)
             self.write_text=write_text
         else:
-            raise WriteError(
+            raise common.WriteException(
                     "invalid text_encoding: {0}".format(text_encoding))
 
+        self.vertex_index_size=vertex_index_size
+        self.vertex_structs=[pmx.get_vertex_struct(t, bone_index_size)
+                for t in range(4)]
         self.write_vertex_index=lambda index: self.write_int(index, vertex_index_size)
         self.write_texture_index=lambda index: self.write_int(index, texture_index_size)
         self.write_material_index=lambda index: self.write_int(index, material_index_size)
@@ -42,13 +52,44 @@ class Writer(common.BinaryWriter):
         self.write_rigidbody_index=lambda index: self.write_int(index, rigidbody_index_size)
 
     def write_vertices(self, vertices):
+        """
+        write each vertex as one record of its deform type.
+        """
         self.write_int(len(vertices), 4)
+        bdef1, bdef2, bdef4, sdef=self.vertex_structs
         for v in vertices:
-            self.write_vector3(v.position)
-            self.write_vector3(v.normal)
-            self.write_vector2(v.uv)
-            self.write_deform(v.deform)
-            self.write_float(v.edge_factor)
+            p=v.position
+            n=v.normal
+            uv=v.uv
+            d=v.deform
+            if isinstance(d, pmx.Bdef1):
+                self.write_struct(bdef1,
+                        p.x, p.y, p.z, n.x, n.y, n.z, uv.x, uv.y,
+                        pmx.DEFORM_BDEF1, d.index0,
+                        v.edge_factor)
+            elif isinstance(d, pmx.Bdef2):
+                self.write_struct(bdef2,
+                        p.x, p.y, p.z, n.x, n.y, n.z, uv.x, uv.y,
+                        pmx.DEFORM_BDEF2, d.index0, d.index1, d.weight0,
+                        v.edge_factor)
+            elif isinstance(d, pmx.Bdef4):
+                self.write_struct(bdef4,
+                        p.x, p.y, p.z, n.x, n.y, n.z, uv.x, uv.y,
+                        pmx.DEFORM_BDEF4,
+                        d.index0, d.index1, d.index2, d.index3,
+                        d.weight0, d.weight1, d.weight2, d.weight3,
+                        v.edge_factor)
+            elif isinstance(d, pmx.Sdef):
+                self.write_struct(sdef,
+                        p.x, p.y, p.z, n.x, n.y, n.z, uv.x, uv.y,
+                        pmx.DEFORM_SDEF, d.index0, d.index1, d.weight0,
+                        d.sdef_c.x, d.sdef_c.y, d.sdef_c.z,
+                        d.sdef_r0.x, d.sdef_r0.y, d.sdef_r0.z,
+                        d.sdef_r1.x, d.sdef_r1.y, d.sdef_r1.z,
+                        v.edge_factor)
+            else:
+                raise common.WriteException(
+                        "unknown deform type: {0}".format(d))
 
     def write_deform(self, deform):
         if isinstance(deform, pmx.Bdef1):
@@ -69,14 +110,31 @@ class Writer(common.BinaryWriter):
             self.write_float(deform.weight1)
             self.write_float(deform.weight2)
             self.write_float(deform.weight3)
+        elif isinstance(deform, pmx.Sdef):
+            self.write_int(3, 1)
+            self.write_bone_index(deform.index0)
+            self.write_bone_index(deform.index1)
+            self.write_float(deform.weight0)
+            self.write_vector3(deform.sdef_c)
+            self.write_vector3(deform.sdef_r0)
+            self.write_vector3(deform.sdef_r1)
         else:
-            raise pymeshio.common.WriteException(
-                    "unknown deform type: {0}".format(deform.type))
+            raise common.WriteException(
+                    "unknown deform type: {0}".format(deform))
 
     def write_indices(self, indices):
+        """
+        write the index section at once.
+        indices is a list, array.array or numpy array.
+        """
         self.write_int(len(indices), 4)
-        for i in indices:
-            self.write_vertex_index(i)
+        if numpy and isinstance(indices, numpy.ndarray):
+            dtype=pmx.VERTEX_INDEX_DTYPES[self.vertex_index_size]
+            self.write_bytes(indices.astype(dtype).tobytes())
+        else:
+            self.write_array(array.array(
+                pmx.VERTEX_INDEX_TYPECODES[self.vertex_index_size],
+                indices))
 
     def write_textures(self, textures):
         self.write_int(len(textures), 4)
@@ -268,25 +326,48 @@ class Writer(common.BinaryWriter):
             self.write_vector3(j.spring_constant_rotation)
 
 
-def write(ios, model, text_encoding=0):
+def serialize(model, text_encoding=0, ios=None):
     """
-    write model to ios.
+    serialize model in memory without any I/O.
+
+    returns the Writer. writer.size is the byte size of the file and
+    writer.flush writes it to ios.
 
     :Parameters:
-        ios
-            output stream (in io.IOBase)
         model
             pmx model
         text_encoding
             text field encoding (0: UTF16, 1:UTF-8).
+        ios
+            output stream for flush
 
     >>> import pymeshio.pmx.writer
-    >>> pymeshio.pmx.writer.write(io.open('out.pmx', 'wb'), pmx_model)
+    >>> print(pymeshio.pmx.writer.serialize(pmx_model).size)
 
     """
-    assert(isinstance(ios, io.IOBase))
     assert(isinstance(model, pmx.Model))
-    writer=common.BinaryWriter(ios)
+    def get_array_size(size):
+        if size<128:
+            return 1
+        elif size<32768:
+            return 2
+        elif size<2147483647:
+            return 4
+        else:
+            raise common.WriteException(
+                    "invalid array_size: {0}".format(size))
+    vertex_index_size=get_array_size(len(model.vertices))
+    texture_index_size=get_array_size(len(model.textures))
+    material_index_size=get_array_size(len(model.materials))
+    bone_index_size=get_array_size(len(model.bones))
+    morph_index_size=get_array_size(len(model.morphs))
+    rigidbody_index_size=get_array_size(len(model.rigidbodies))
+
+    writer=Writer(ios, 
+            text_encoding, 0,
+            vertex_index_size, texture_index_size, material_index_size,
+            bone_index_size, morph_index_size, rigidbody_index_size)
+
     # header
     writer.write_bytes(b"PMX ")
     writer.write_float(model.version)
@@ -297,40 +378,19 @@ def write(ios, model, text_encoding=0):
     writer.write_int(text_encoding, 1)
     # extend uv
     writer.write_int(0, 1)
-    def get_array_size(size):
-        if size<128:
-            return 1
-        elif size<32768:
-            return 2
-        elif size<2147483647:
-            return 4
-        else:
-            raise common.WriteError(
-                    "invalid array_size: {0}".format(size))
     # vertex_index_size
-    vertex_index_size=get_array_size(len(model.vertices))
     writer.write_int(vertex_index_size, 1)
     # texture_index_size
-    texture_index_size=get_array_size(len(model.textures))
     writer.write_int(texture_index_size, 1)
     # material_index_size
-    material_index_size=get_array_size(len(model.materials))
     writer.write_int(material_index_size, 1)
     # bone_index_size
-    bone_index_size=get_array_size(len(model.bones))
     writer.write_int(bone_index_size, 1)
     # morph_index_size
-    morph_index_size=get_array_size(len(model.morphs))
     writer.write_int(morph_index_size, 1)
     # rigidbody_index_size
-    rigidbody_index_size=get_array_size(len(model.rigidbodies))
     writer.write_int(rigidbody_index_size, 1)
 
-    writer=Writer(writer.ios, 
-            text_encoding, 0,
-            vertex_index_size, texture_index_size, material_index_size,
-            bone_index_size, morph_index_size, rigidbody_index_size)
- 
     # model info
     writer.write_text(model.name)
     writer.write_text(model.english_name)
@@ -347,5 +407,26 @@ def write(ios, model, text_encoding=0):
     writer.write_display_slots(model.display_slots)
     writer.write_rigidbodies(model.rigidbodies)
     writer.write_joints(model.joints)
+    return writer
+
+
+def write(ios, model, text_encoding=0):
+    """
+    write model to ios.
+
+    :Parameters:
+        ios
+            output stream (in io.IOBase)
+        model
+            pmx model
+        text_encoding
+            text field encoding (0: UTF16, 1:UTF-8).
+
+    >>> import pymeshio.pmx.writer
+    >>> pymeshio.pmx.writer.write(io.open('out.pmx', 'wb'), pmx_model)
+
+    """
+    assert(isinstance(ios, io.IOBase))
+    serialize(model, text_encoding, ios).flush()
     return True
 
@@ -14,43 +14,203 @@ import io
 import os
 import struct
 from .. import common
+try:
+    import numpy
+except ImportError:
+    numpy=None
+
+
+"""
+fixed size record layouts(little endian, no padding)
+"""
+# name, frame, pos(3f), q(4f), complement
+BONE_FRAME_STRUCT=struct.Struct("<15sI3f4f64s")
+# name, frame, ratio
+MORPH_FRAME_STRUCT=struct.Struct("<15sIf")
+# frame, length, pos(3f), euler(3f), complement, angle, perspective
+CAMERA_FRAME_STRUCT=struct.Struct("<If3f3f24sfB")
+# frame, color(3f), pos(3f)
+LIGHT_FRAME_STRUCT=struct.Struct("<I3f3f")
+# frame, mode, distance
+SELF_SHADOW_FRAME_STRUCT=struct.Struct("<IBf")
+assert(BONE_FRAME_STRUCT.size==111)
+assert(MORPH_FRAME_STRUCT.size==23)
+assert(CAMERA_FRAME_STRUCT.size==61)
+assert(LIGHT_FRAME_STRUCT.size==28)
+assert(SELF_SHADOW_FRAME_STRUCT.size==9)
+# 30 bytes signature of the version 2
+SIGNATURE=b"Vocaloid Motion Data 0002".ljust(30, b"\x00")
+# frames per second of the frame numbers
+FPS=30.0
+# Motion attribute names of the frame sections in the file order
+SECTIONS=['motions', 'shapes', 'cameras', 'lights', 'self_shadows']
+FRAME_STRUCTS={
+        'motions': BONE_FRAME_STRUCT,
+        'shapes': MORPH_FRAME_STRUCT,
+        'cameras': CAMERA_FRAME_STRUCT,
+        'lights': LIGHT_FRAME_STRUCT,
+        'self_shadows': SELF_SHADOW_FRAME_STRUCT,
+        }
+if numpy:
+    # same layouts as the structs for the array mode.
+    # name is the raw 15 bytes that may have garbage after the first
+    # zero. use common.truncate_zero for the name string.
+    BONE_FRAME_DTYPE=numpy.dtype([
+        ('name', 'S15'),
+        ('frame', '<u4'),
+        ('pos', '<f4', (3,)),
+        ('q', '<f4', (4,)),
+        ('complement', 'u1', (64,)),
+        ])
+    MORPH_FRAME_DTYPE=numpy.dtype([
+        ('name', 'S15'),
+        ('frame', '<u4'),
+        ('ratio', '<f4'),
+        ])
+    CAMERA_FRAME_DTYPE=numpy.dtype([
+        ('frame', '<u4'),
+        ('length', '<f4'),
+        ('pos', '<f4', (3,)),
+        ('euler', '<f4', (3,)),
+        ('complement', 'u1', (24,)),
+        ('angle', '<f4'),
+        ('perspective', 'u1'),
+        ])
+    LIGHT_FRAME_DTYPE=numpy.dtype([
+        ('frame', '<u4'),
+        ('color', '<f4', (3,)),
+        ('pos', '<f4', (3,)),
+        ])
+    SELF_SHADOW_FRAME_DTYPE=numpy.dtype([
+        ('frame', '<u4'),
+        ('mode', 'u1'),
+        ('distance', '<f4'),
+        ])
+    assert(BONE_FRAME_DTYPE.itemsize==111)
+    assert(MORPH_FRAME_DTYPE.itemsize==23)
+    assert(CAMERA_FRAME_DTYPE.itemsize==61)
+    assert(LIGHT_FRAME_DTYPE.itemsize==28)
+    assert(SELF_SHADOW_FRAME_DTYPE.itemsize==9)
+    FRAME_DTYPES={
+            'motions': BONE_FRAME_DTYPE,
+            'shapes': MORPH_FRAME_DTYPE,
+            'cameras': CAMERA_FRAME_DTYPE,
+            'lights': LIGHT_FRAME_DTYPE,
+            'self_shadows': SELF_SHADOW_FRAME_DTYPE,
+            }
+
+
+def build_bone_complement(curves):
+    """
+    build the 64 bytes interpolation block of a bone frame.
+
+    :Parameters:
+      curves
+        4 (x1, y1, x2, y2) control points in 0..127 of the x, y, z
+        and rotation curves.
+    """
+    row=([c[0] for c in curves]+[c[1] for c in curves]
+            +[c[2] for c in curves]+[c[3] for c in curves])
+    block=bytearray(64)
+    for k in range(4):
+        # shifted copies of the first row
+        line=row[k:]+[1]+[0]*k
+        block[16*k:16*k+16]=bytearray(line[:16])
+    return bytes(block)
+
+
+def build_camera_complement(curves):
+    """
+    build the 24 bytes interpolation block of a camera frame.
+
+    :Parameters:
+      curves
+        6 (x1, y1, x2, y2) control points in 0..127 of the x, y, z,
+        rotation, length and angle curves.
+    """
+    return bytes(bytearray(v for c in curves
+        for v in (c[0], c[2], c[1], c[3])))
+
+
+# straight line curves
+LINEAR_CURVE=(20, 20, 107, 107)
+LINEAR_BONE_COMPLEMENT=build_bone_complement([LINEAR_CURVE]*4)
+LINEAR_CAMERA_COMPLEMENT=build_camera_complement([LINEAR_CURVE]*6)
+
+
+def get_name_field(name, raw_name):
+    """
+    returns the raw name field if it still holds the name, otherwise
+    the name to be zero padded.
+    """
+    if raw_name is not None and common.truncate_zero(raw_name)==name:
+        return raw_name
+    return name
 
 
 class MorphFrame(object):
     """
     morphing animation data.
+
+    raw_name is the raw 15 bytes name field of the file or None.
     """
-    __slots__=['name', 'frame', 'ratio']
+    __slots__=['name', 'raw_name', 'frame', 'ratio']
     def __init__(self, name):
         self.name=name
+        self.raw_name=None
         self.frame=-1
         self.ratio=0
 
     def __cmp__(self, other):
         return cmp(self.frame, other.frame)
 
+    def __lt__(self, other):
+        return self.frame<other.frame
+
+    def struct_values(self):
+        """values of MORPH_FRAME_STRUCT"""
+        return (get_name_field(self.name, self.raw_name),
+                self.frame, self.ratio)
+
 
 class BoneFrame(object):
     """
     bone animation data.
+
+    complement is the raw 64 bytes interpolation block.
+    raw_name is the raw 15 bytes name field of the file or None.
     """
-    __slots__=['name', 'frame', 'pos', 'q', 'complement']
+    __slots__=['name', 'raw_name', 'frame', 'pos', 'q', 'complement']
     def __init__(self, name):
         self.name=name
+        self.raw_name=None
         self.frame=-1
         self.pos=common.Vector3()
         self.q=common.Quaternion()
+        self.complement=LINEAR_BONE_COMPLEMENT
 
     def __cmp__(self, other):
         return cmp(self.frame, other.frame)
 
+    def __lt__(self, other):
+        return self.frame<other.frame
+
     def __str__(self):
         return '<BoneFrame "%s" %d %s%s>' % (self.name, self.frame, self.pos, self.q)
 
+    def struct_values(self):
+        """values of BONE_FRAME_STRUCT"""
+        return (get_name_field(self.name, self.raw_name), self.frame,
+                self.pos.x, self.pos.y, self.pos.z,
+                self.q.x, self.q.y, self.q.z, self.q.w,
+                self.complement)
+
 
 class CameraFrame(object):
     """
     camera animation data.
+
+    complement is the raw 24 bytes interpolation block.
     """
     __slots__=['frame', 'length', 'pos', 'euler', 'complement', 'angle', 'perspective']
     def __init__(self):
@@ -58,32 +218,198 @@ class CameraFrame(object):
         self.length=0
         self.pos=common.Vector3()
         self.euler=common.Vector3()
-        self.complement=None
+        self.complement=LINEAR_CAMERA_COMPLEMENT
         self.angle=0
         self.perspective=True
 
     def __cmp__(self, other):
         return cmp(self.frame, other.frame)
 
+    def __lt__(self, other):
+        return self.frame<other.frame
+
     def __str__(self):
         return '<CameraFrame %d %s%s>' % (self.frame, self.pos, self.euler)
 
+    def struct_values(self):
+        """values of CAMERA_FRAME_STRUCT"""
+        return (self.frame, self.length,
+                self.pos.x, self.pos.y, self.pos.z,
+                self.euler.x, self.euler.y, self.euler.z,
+                self.complement, self.angle, self.perspective)
+
+
+class LightFrame(object):
+    """
+    light animation data.
+    """
+    __slots__=['frame', 'color', 'pos']
+    def __init__(self):
+        self.frame=-1
+        self.color=common.RGB()
+        self.pos=common.Vector3()
+
+    def __lt__(self, other):
+        return self.frame<other.frame
+
+    def __str__(self):
+        return '<LightFrame %d %s%s>' % (self.frame, self.color, self.pos)
+
+    def struct_values(self):
+        """values of LIGHT_FRAME_STRUCT"""
+        return (self.frame,
+                self.color.r, self.color.g, self.color.b,
+                self.pos.x, self.pos.y, self.pos.z)
+
+
+class SelfShadowFrame(object):
+    """
+    self shadow animation data.
+    """
+    __slots__=['frame', 'mode', 'distance']
+    def __init__(self):
+        self.frame=-1
+        self.mode=0
+        self.distance=0
+
+    def __lt__(self, other):
+        return self.frame<other.frame
+
+    def __str__(self):
+        return '<SelfShadowFrame %d %d %f>' % (self.frame, self.mode, self.distance)
+
+    def struct_values(self):
+        """values of SELF_SHADOW_FRAME_STRUCT"""
+        return (self.frame, self.mode, self.distance)
+
+
+class NameTable(object):
+    """
+    distinct frame names of a motion.
+
+    every interned name of the same bytes is one object, so that
+    a name costs memory once for all the frames and the frames are grouped
+    by identity. the unicode of a name is decoded on demand and cached.
+
+    :IVariables:
+        names
+            distinct names in the order of appearance. the index is the
+            name id.
+        ids
+            {name: name id}
+    """
+    __slots__=['names', 'ids', 'raw_names', 'unicodes']
+    def __init__(self):
+        self.names=[]
+        self.ids={}
+        self.raw_names={}
+        self.unicodes={}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def __str__(self):
+        return '<NameTable %d names>' % len(self.names)
+
+    def intern(self, name):
+        """
+        returns the canonical object of the name.
+        """
+        id=self.ids.get(name)
+        if id is None:
+            self.ids[name]=len(self.names)
+            self.names.append(name)
+            return name
+        return self.names[id]
+
+    def intern_field(self, raw):
+        """
+        returns the canonical raw bytes and the canonical name of a raw
+        fixed size name field.
+        the field is cut at the first zero only once for each raw bytes.
+        """
+        field=self.raw_names.get(raw)
+        if field is None:
+            field=(raw, self.intern(common.truncate_zero(raw)))
+            self.raw_names[raw]=field
+        return field
+
+    def intern_raw(self, raw):
+        """
+        returns the canonical name of a raw fixed size name field.
+        """
+        return self.intern_field(raw)[1]
+
+    def get_id(self, name):
+        """
+        returns the name id. a new name is interned.
+        """
+        id=self.ids.get(name)
+        if id is None:
+            id=len(self.names)
+            self.ids[name]=id
+            self.names.append(name)
+        return id
+
+    def get_ids(self, frames):
+        """
+        returns the name ids of a numpy structured array of named frames
+        as int32 (N,). new names are interned.
+        """
+        common.require_numpy("get_ids")
+        unique, inverse=numpy.unique(truncate_names(frames['name']),
+                return_inverse=True)
+        ids=numpy.array([self.get_id(bytes(name)) for name in unique],
+                numpy.int32)
+        return ids[inverse.reshape(-1)]
+
+    def decode(self, name):
+        """
+        returns the unicode of the cp932 name.
+        """
+        text=self.unicodes.get(name)
+        if text is None:
+            text=name.decode('cp932', 'replace')
+            self.unicodes[name]=text
+        return text
+
 
 class Motion(object):
+    """
+    motions, shapes, cameras, lights and self_shadows are lists of the frames,
+    or numpy structured arrays of FRAME_DTYPES in the array mode.
+
+    names is the NameTable of the frame names. the reader interns the
+    names of the frames in it in the object mode.
+
+    signature and raw_model_name are the raw fixed size fields of the
+    file, so that a motion is written back byte by byte.
+    """
     __slots__=[
+            'signature',
             'model_name',
+            'raw_model_name',
+            'names',
             'motions',
             'shapes',
             'cameras',
             'lights',
+            'self_shadows',
             'last_frame',
             ]
     def __init__(self):
-        self.model_name=''
+        self.signature=SIGNATURE
+        self.model_name=b''
+        self.raw_model_name=None
+        self.names=NameTable()
         self.motions=[]
         self.shapes=[]
         self.cameras=[]
         self.lights=[]
+        self.self_shadows=[]
         self.last_frame=0
 
     def __str__(self):
@@ -91,3 +417,355 @@ class Motion(object):
             self.model_name, len(self.motions), len(self.shapes),
             len(self.cameras), len(self.lights))
 
+    def build_index(self):
+        """
+        returns the MotionIndex of the current frames.
+        """
+        return MotionIndex(self)
+
+
+def to_frame_array(name, frames):
+    """
+    convert the frame list of the section to a numpy structured array
+    of FRAME_DTYPES[name]. an array is returned as is.
+    """
+    common.require_numpy("to_frame_array")
+    if isinstance(frames, numpy.ndarray):
+        return frames
+    s=FRAME_STRUCTS[name]
+    buf=b"".join(s.pack(*f.struct_values()) for f in frames)
+    return numpy.frombuffer(buf, FRAME_DTYPES[name]).copy()
+
+
+def truncate_names(names):
+    """
+    vectorized common.truncate_zero for a numpy fixed size bytes array.
+    """
+    size=names.dtype.itemsize
+    raw=numpy.ascontiguousarray(names).view(numpy.uint8).reshape(-1, size)
+    raw=numpy.where(numpy.cumsum(raw==0, axis=1)>0, 0, raw).astype(numpy.uint8)
+    return raw.view(names.dtype).reshape(names.shape)
+
+
+def group_frames(frames):
+    """
+    group the structured array of named frames by the name.
+
+    returns [(name, indices)]. indices are sorted by the frame number.
+    """
+    if len(frames)==0:
+        return []
+    names=truncate_names(frames['name'])
+    unique, inverse=numpy.unique(names, return_inverse=True)
+    order=numpy.lexsort((frames['frame'], inverse))
+    bounds=numpy.searchsorted(inverse[order], numpy.arange(len(unique)+1))
+    return [(bytes(name), order[bounds[i]:bounds[i+1]])
+            for i, name in enumerate(unique)]
+
+
+class Track(object):
+    """
+    keyframes of a bone, a morph or the camera sorted by the frame number.
+    """
+    __slots__=['frames']
+    def __init__(self, frames):
+        self.frames=frames['frame']
+
+    def __len__(self):
+        return len(self.frames)
+
+    def find_keys(self, t):
+        """
+        returns the indices of the keyframes bracketing t as (prev, next).
+        prev is the last key at or before t and next is the key after it.
+        both are clamped to the first or the last key.
+        t is a frame number or a numpy array of them.
+        raise ValueError for an empty track.
+        """
+        if not len(self.frames):
+            raise ValueError("find_keys on an empty track")
+        last=len(self.frames)-1
+        next=numpy.searchsorted(self.frames, t, 'right')
+        prev=numpy.clip(next-1, 0, last)
+        next=numpy.minimum(next, last)
+        return prev, next
+
+
+class BoneTrack(Track):
+    """
+    :IVariables:
+        name
+            bone name
+        frames
+            frame numbers (N,)
+        positions
+            float32 (N, 3)
+        rotations
+            float32 (N, 4) quaternions(x, y, z, w)
+        complements
+            uint8 (N, 64) interpolation blocks
+    """
+    __slots__=['name', 'positions', 'rotations', 'complements']
+    def __init__(self, name, frames):
+        super(BoneTrack, self).__init__(frames)
+        self.name=name
+        self.positions=frames['pos']
+        self.rotations=frames['q']
+        self.complements=frames['complement']
+
+    def __str__(self):
+        return '<BoneTrack "%s" %d keys>' % (self.name, len(self))
+
+
+class MorphTrack(Track):
+    """
+    :IVariables:
+        name
+            morph name
+        frames
+            frame numbers (N,)
+        ratios
+            float32 (N,)
+    """
+    __slots__=['name', 'ratios']
+    def __init__(self, name, frames):
+        super(MorphTrack, self).__init__(frames)
+        self.name=name
+        self.ratios=frames['ratio']
+
+    def __str__(self):
+        return '<MorphTrack "%s" %d keys>' % (self.name, len(self))
+
+
+class CameraTrack(Track):
+    """
+    :IVariables:
+        frames
+            frame numbers (N,)
+        lengths
+            float32 (N,)
+        positions
+            float32 (N, 3)
+        eulers
+            float32 (N, 3)
+        complements
+            uint8 (N, 24) interpolation blocks
+        angles
+            float32 (N,)
+        perspectives
+            uint8 (N,)
+    """
+    __slots__=['lengths', 'positions', 'eulers', 'complements',
+            'angles', 'perspectives']
+    def __init__(self, frames):
+        super(CameraTrack, self).__init__(frames)
+        self.lengths=frames['length']
+        self.positions=frames['pos']
+        self.eulers=frames['euler']
+        self.complements=frames['complement']
+        self.angles=frames['angle']
+        self.perspectives=frames['perspective']
+
+    def __str__(self):
+        return '<CameraTrack %d keys>' % len(self)
+
+
+class MotionIndex(object):
+    """
+    per track keyframe index of a Motion(requires numpy).
+    built once after load for bisection lookups.
+
+    :IVariables:
+        bones
+            {bone name: BoneTrack}
+        morphs
+            {morph name: MorphTrack}
+        camera
+            CameraTrack
+    """
+    __slots__=['bones', 'morphs', 'camera']
+    def __init__(self, motion):
+        common.require_numpy("MotionIndex")
+        frames=to_frame_array('motions', motion.motions)
+        self.bones=dict((name, BoneTrack(name, frames[index]))
+                for name, index in group_frames(frames))
+        frames=to_frame_array('shapes', motion.shapes)
+        self.morphs=dict((name, MorphTrack(name, frames[index]))
+                for name, index in group_frames(frames))
+        frames=to_frame_array('cameras', motion.cameras)
+        self.camera=CameraTrack(
+                frames[numpy.argsort(frames['frame'], kind='mergesort')])
+
+    def __str__(self):
+        return '<MotionIndex %d bones, %d morphs, %d camera keys>' % (
+                len(self.bones), len(self.morphs), len(self.camera))
+
+
+MERGE_MODES=['last', 'blend']
+
+
+def merge_frames(frames, sources, mode='last'):
+    """
+    resolve the frames of the same track at the same frame number.
+
+    returns the frames sorted by (name, frame).
+
+    :Parameters:
+      frames
+        numpy structured array of FRAME_DTYPES
+      sources
+        int (N,) motion indices of the frames. a later motion wins.
+      mode
+        'last' or 'blend'
+    """
+    keys=[sources, frames['frame']]
+    if 'name' in frames.dtype.names:
+        _, ids=numpy.unique(truncate_names(frames['name']), return_inverse=True)
+        keys.append(ids.reshape(-1))
+    order=numpy.lexsort(keys)
+    frames=frames[order]
+    if len(frames)==0:
+        return frames
+    change=numpy.zeros(len(frames), bool)
+    change[0]=True
+    for key in keys[1:]:
+        key=key[order]
+        change[1:]|=key[1:]!=key[:-1]
+    starts=numpy.flatnonzero(change)
+    lasts=numpy.append(starts[1:], len(frames))-1
+    merged=frames[lasts]
+    if mode=='blend' and len(merged)<len(frames):
+        counts=(lasts-starts+1).astype(numpy.float64)
+        if 'ratio' in frames.dtype.names:
+            merged['ratio']=numpy.add.reduceat(
+                    frames['ratio'].astype(numpy.float64), starts)/counts
+        if 'q' in frames.dtype.names:
+            merged['pos']=numpy.add.reduceat(
+                    frames['pos'].astype(numpy.float64), starts)/counts[:, None]
+            # align the quaternions to the first of the group
+            q=frames['q'].astype(numpy.float64)
+            first=q[starts][numpy.cumsum(change)-1]
+            q*=numpy.where(numpy.sum(q*first, axis=1)<0, -1.0, 1.0)[:, None]
+            q=numpy.add.reduceat(q, starts)
+            norm=numpy.linalg.norm(q, axis=1)
+            merged['q']=q/numpy.where(norm>0, norm, 1.0)[:, None]
+    return merged
+
+
+def merge(motions, offsets=None, mode='last'):
+    """
+    merge the motions into a new Motion in the array mode(requires numpy).
+
+    the frames of the same track at the same frame number are resolved by
+    the mode. 'last' takes the frame of the later motion. 'blend' averages
+    the bone positions, the bone rotations and the morph ratios. the other
+    values and the other sections are taken from the later motion.
+
+    :Parameters:
+      motions
+        list of Motion
+      offsets
+        frame offsets of the motions. None for no offset.
+        frames shifted before the frame 0 are dropped.
+      mode
+        'last' or 'blend'
+    """
+    common.require_numpy("merge")
+    if mode not in MERGE_MODES:
+        raise ValueError("unknown merge mode: %s" % mode)
+    if offsets is None:
+        offsets=[0]*len(motions)
+    if len(offsets)!=len(motions):
+        raise ValueError("%d offsets for %d motions" % (
+            len(offsets), len(motions)))
+    result=Motion()
+    if motions:
+        result.model_name=motions[0].model_name
+    for name in SECTIONS:
+        arrays=[]
+        sources=[]
+        for i, (motion, offset) in enumerate(zip(motions, offsets)):
+            frames=to_frame_array(name, getattr(motion, name))
+            frame_numbers=frames['frame'].astype(numpy.int64)+offset
+            keep=frame_numbers>=0
+            frames=frames[keep]
+            frames['frame']=frame_numbers[keep]
+            arrays.append(frames)
+            sources.append(numpy.full(len(frames), i, numpy.int64))
+        if not arrays:
+            setattr(result, name, numpy.zeros(0, FRAME_DTYPES[name]))
+            continue
+        setattr(result, name, merge_frames(numpy.concatenate(arrays),
+            numpy.concatenate(sources), mode))
+    return result
+
+
+def slice(motion, start, end, rebase=True):
+    """
+    cut the frames from start to end into a new Motion in the array mode
+    (requires numpy).
+
+    a bone or morph track with keys before the start or after the end
+    gets a key sampled at there, so that the poses at the cut are kept.
+    the key at the end reuses the interpolation block of the next key,
+    so the frames between the last key and the end follow the original
+    curve only approximately. the other sections are cut as they are.
+
+    :Parameters:
+      start
+        first frame number
+      end
+        last frame number(inclusive)
+      rebase
+        shift the frames so that the start is the frame 0
+    """
+    common.require_numpy("slice")
+    from . import sampler
+    result=Motion()
+    result.model_name=motion.model_name
+    index=MotionIndex(motion)
+
+    def cut(frames, evaluate):
+        rows=[]
+        for name, indices in group_frames(frames):
+            track=frames[indices]
+            numbers=track['frame']
+            if numbers[0]<start and start not in numbers:
+                row=track[numbers<start][-1:].copy()
+                row['frame']=start
+                evaluate(name, row)
+                rows.append(row)
+            rows.append(track[(numbers>=start) & (numbers<=end)])
+            if numbers[-1]>end and end not in numbers:
+                # the interpolation block of the next key
+                row=track[numbers>end][:1].copy()
+                row['frame']=end
+                evaluate(name, row)
+                rows.append(row)
+        if not rows:
+            return frames[:0]
+        return numpy.concatenate(rows)
+
+    def evaluate_bone(name, rows):
+        positions, rotations=sampler.BoneSampler(index.bones, [name]).sample(
+                rows['frame'])
+        rows['pos']=positions[:, 0]
+        rows['q']=rotations[:, 0]
+
+    def evaluate_morph(name, rows):
+        track=index.morphs[name]
+        rows['ratio']=numpy.interp(rows['frame'], track.frames, track.ratios)
+
+    result.motions=cut(to_frame_array('motions', motion.motions),
+            evaluate_bone)
+    result.shapes=cut(to_frame_array('shapes', motion.shapes),
+            evaluate_morph)
+    for name in ['cameras', 'lights', 'self_shadows']:
+        frames=to_frame_array(name, getattr(motion, name))
+        numbers=frames['frame']
+        setattr(result, name, frames[(numbers>=start) & (numbers<=end)])
+    if rebase:
+        for name in SECTIONS:
+            frames=getattr(result, name)
+            frames['frame']-=start
+    return result
@@ -3,42 +3,52 @@
 vmd reader
 """
 import io
-import struct
 from .. import common
 from .. import vmd
+try:
+    import numpy
+except ImportError:
+    numpy=None
 
 
-class Reader(common.BinaryReader):
+class Reader(common.BufferReader):
+    """vmd reader
+
+    frame names are interned in the vmd.NameTable.
+    """
+    def __init__(self, buf, pos=0):
+        super(Reader, self).__init__(buf, pos)
+        self.names=vmd.NameTable()
+
     def read_text(self, size):
         """read cp932 text
         """
-        src=self.unpack("%ds" % size, size)
-        assert(type(src)==bytes)
-        pos = src.find(b"\x00")
-        if pos==-1:
-            return src
-        else:
-            return src[:pos]
+        return common.truncate_zero(self.read_bytes(size))
 
     def read_bone_frame(self):
         """
         フレームひとつ分を読み込む(111 bytes)
         """
-        frame=vmd.BoneFrame(self.read_text(15))
+        data=self.read_struct(vmd.BONE_FRAME_STRUCT)
+        raw_name, name=self.names.intern_field(data[0])
+        frame=vmd.BoneFrame(name)
+        frame.raw_name=raw_name
         (frame.frame, frame.pos.x, frame.pos.y, frame.pos.z,
-        frame.q.x, frame.q.y, frame.q.z, frame.q.w) = struct.unpack(
-                'I7f', self.ios.read(32))
+        frame.q.x, frame.q.y, frame.q.z, frame.q.w,
         # complement data
-        frame.complement=''.join(
-                ['%x' % x for x in struct.unpack('64B', self.ios.read(64))])
+        frame.complement) = data[1:]
         return frame
 
     def read_morph_frame(self):
         """
         モーフデータひとつ分を読み込む(23 bytes)
         """
-        frame=vmd.MorphFrame(self.read_text(15))
-        (frame.frame, frame.ratio)=struct.unpack('If', self.ios.read(8))
+        raw_name, frame_number, ratio=self.read_struct(vmd.MORPH_FRAME_STRUCT)
+        raw_name, name=self.names.intern_field(raw_name)
+        frame=vmd.MorphFrame(name)
+        frame.raw_name=raw_name
+        frame.frame=frame_number
+        frame.ratio=ratio
         return frame
 
     def read_camera_frame(self):
@@ -48,56 +58,197 @@ class Reader(common.BinaryReader):
         frame=vmd.CameraFrame()
         (frame.frame, frame.length,
                 frame.pos.x, frame.pos.y, frame.pos.z,
-                frame.euler.x, frame.euler.y, frame.euler.z
-                )=struct.unpack('If3f3f', self.ios.read(32))
-        # complement data
-        frame.complement=''.join(
-                ['%x' % x for x in struct.unpack('24B', self.ios.read(24))])
-        (frame.angle, frame.perspective
-                )=struct.unpack('fB', self.ios.read(5))
+                frame.euler.x, frame.euler.y, frame.euler.z,
+                # complement data
+                frame.complement,
+                frame.angle, frame.perspective
+                )=self.read_struct(vmd.CAMERA_FRAME_STRUCT)
+        return frame
+
+    def read_light_frame(self):
+        """
+        照明データひとつ分を読み込む(28 bytes)
+        """
+        frame=vmd.LightFrame()
+        (frame.frame,
+                frame.color.r, frame.color.g, frame.color.b,
+                frame.pos.x, frame.pos.y, frame.pos.z
+                )=self.read_struct(vmd.LIGHT_FRAME_STRUCT)
+        return frame
+
+    def read_self_shadow_frame(self):
+        """
+        セルフ影データひとつ分を読み込む(9 bytes)
+        """
+        frame=vmd.SelfShadowFrame()
+        (frame.frame, frame.mode, frame.distance
+                )=self.read_struct(vmd.SELF_SHADOW_FRAME_STRUCT)
         return frame
 
+    def read_frame_array(self, dtype, count):
+        """
+        decode count frames at once to a numpy structured array(array mode).
+        copied so that the result does not refer the source buffer.
+        """
+        frames=numpy.frombuffer(self.buf, dtype, count, self.pos)
+        self.pos+=dtype.itemsize*count
+        return frames.copy()
+
+    def read_section(self, name, count, array=False):
+        """
+        decode the frames of the section.
+        """
+        if array:
+            return self.read_frame_array(vmd.FRAME_DTYPES[name], count)
+        read_frame={
+                'motions': self.read_bone_frame,
+                'shapes': self.read_morph_frame,
+                'cameras': self.read_camera_frame,
+                'lights': self.read_light_frame,
+                'self_shadows': self.read_self_shadow_frame,
+                }[name]
+        return [read_frame() for _ in range(count)]
+
+    def read_count(self):
+        """
+        old files end before the camera or light section.
+        """
+        if self.is_end():
+            return 0
+        return self.unpack('I', 4)
+
 
-def read_from_file(path):
+def read_from_file(path, mmap=False, array=False):
     """
     read from file path
 
     :Parameters:
       path
         file path
+      mmap
+        parse from a read only mmap instead of reading
+        all bytes of the file to memory.
+      array
+        decode frames to numpy structured arrays of vmd.FRAME_DTYPES
+        (requires numpy).
 
     >>> import pymeshio.vmd.reader
     >>> m=pymeshio.vmd.reader.read_from_file('resources/motion.vmd')
     >>> print(m)
 
     """
-    return read(io.BytesIO(common.readall(path)))
+    if mmap:
+        with common.open_mapped(path) as buf:
+            return read_from_buffer(buf, array)
+    return read_from_buffer(common.readall(path), array)
 
 
-def read(ios):
+def read(ios, array=False):
     assert(isinstance(ios, io.IOBase))
-    reader=common.BinaryReader(ios)
+    return read_from_buffer(ios.read(), array)
 
+
+def __read_header(buf):
+    """
+    returns the version and the reader at the model name.
+    None for an invalid signature.
+    """
+    reader=common.BufferReader(memoryview(buf))
     signature=reader.unpack("30s", 30)
-    version=None
-    if signature[:25] == "Vocaloid Motion Data 0002":
+    if signature[:25] == b"Vocaloid Motion Data 0002":
         version=2
-    elif signature[:25] == "Vocaloid Motion Data file":
+    elif signature[:25] == b"Vocaloid Motion Data file":
         version=1
     else:
         print("invalid signature", signature)
-        return
+        return None, None
+    return version, Reader(reader.buf, reader.pos)
+
 
-    reader=Reader(reader.ios)
+def read_from_buffer(buf, array=False):
+    """
+    read from bytes-like buffer(bytes, bytearray, memoryview or mmap)
+    """
+    if array:
+        common.require_numpy("array mode")
+    version, reader=__read_header(buf)
+    if not reader:
+        return
     motion=vmd.Motion()
-    motion.model_name=reader.read_text(20)
-    motion.motions=[reader.read_bone_frame() 
-            for _ in range(reader.unpack('I', 4))]
-    motion.shapes=[reader.read_morph_frame() 
-            for _ in range(reader.unpack('I', 4))]
-    motion.cameras=[reader.read_camera_frame() 
-            for _ in range(reader.unpack('I', 4))]
-    motion.lights=[reader.read_light_frame() 
-            for _ in range(reader.unpack('I', 4))]
+    motion.names=reader.names
+    motion.signature=bytes(reader.buf[:30])
+    motion.raw_model_name=reader.read_bytes(20)
+    motion.model_name=common.truncate_zero(motion.raw_model_name)
+    for name in vmd.SECTIONS:
+        setattr(motion, name,
+                reader.read_section(name, reader.read_count(), array))
     return motion
 
+
+def iter_frames(path, name, chunk_size=65536):
+    """
+    iterate the frames of a section in chunks of numpy structured
+    arrays without reading the whole file(requires numpy).
+
+    :Parameters:
+      path
+        file path
+      name
+        a name in vmd.SECTIONS
+      chunk_size
+        frames per chunk
+    """
+    common.require_numpy("iter_frames")
+    dtype=vmd.FRAME_DTYPES[name]
+    with common.open_mapped(path) as buf:
+        version, reader=__read_header(buf)
+        if not reader:
+            raise common.ParseException("invalid signature")
+        reader.skip(20)
+        for section in vmd.SECTIONS:
+            count=reader.read_count()
+            if section==name:
+                break
+            reader.skip(vmd.FRAME_STRUCTS[section].size*count)
+        try:
+            for begin in range(0, count, chunk_size):
+                yield reader.read_frame_array(
+                        dtype, min(chunk_size, count-begin))
+        finally:
+            reader.release()
+
+
+def probe(path):
+    """
+    read the header and the frame counts of the vmd file,
+    then return the common.Probe.
+
+    :Parameters:
+      path
+        file path
+    """
+    with common.open_mapped(path) as buf:
+        probe=probe_from_buffer(buf)
+    probe.path=path
+    return probe
+
+
+def probe_from_buffer(buf):
+    """
+    probe from bytes-like buffer.
+    """
+    version, reader=__read_header(buf)
+    if not reader:
+        raise common.ParseException("invalid signature")
+    probe=common.Probe('vmd', version, reader.read_text(20))
+    for name in vmd.SECTIONS:
+        if reader.is_end():
+            break
+        offset=reader.pos
+        count=reader.read_count()
+        reader.skip(vmd.FRAME_STRUCTS[name].size*count)
+        probe.sections.append(
+                common.Section(name, offset, reader.pos-offset, count))
+    if reader.pos>reader.end:
+        raise common.ParseException("section over eof")
+    return probe
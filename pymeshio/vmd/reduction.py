@@ -0,0 +1,260 @@
+# coding: utf-8
+"""
+vmd keyframe reduction
+
+remove redundant bone and morph keyframes within error tolerances
+(requires numpy).
+
+each track is compared with its original curve sampled at every frame.
+from a kept key, the farthest key that can be reached within the
+tolerances is searched by galloping then bisection, and the keys
+between them are removed. the curves of the bone channels over a
+removed span are fitted from PRESET_CURVES. the curve values of
+a span length are evaluated once and shared by the tracks.
+"""
+import math
+from .. import common
+from .. import vmd
+from . import sampler
+try:
+    import numpy
+except ImportError:
+    numpy=None
+
+
+# (x1, y1, x2, y2) in 0..127
+PRESET_CURVES=[
+        (20, 20, 107, 107), # linear
+        (64, 0, 64, 127), # ease in out
+        (127, 0, 0, 127), # strong ease in out
+        (64, 0, 107, 107), # ease in
+        (20, 20, 64, 127), # ease out
+        (127, 0, 107, 107), # strong ease in
+        (20, 20, 0, 127), # strong ease out
+        ]
+
+
+def find_spans(frames, fit, max_span):
+    """
+    greedy search of the kept keys.
+
+    :Parameters:
+      frames
+        sorted frame numbers of a track
+      fit
+        fit(i, j) returns a fitting result of the span from the key i
+        to the key j(j>i+1) more than a frame apart, or None if the span
+        is out of the tolerances.
+      max_span
+        max frames between kept keys
+
+    returns [(key index, fitting result)]. the result is None for
+    the first key and the keys kept with the original curve.
+    """
+    def fit_apart(i, j):
+        if frames[j]-frames[i]<2:
+            # duplicated keys
+            return None
+        return fit(i, j)
+    count=len(frames)
+    reachable=numpy.searchsorted(frames, frames+max_span, 'right')-1
+    spans=[(0, None)]
+    i=0
+    while i<count-1:
+        last=max(reachable[i], i+1)
+        lo=i+1
+        lo_result=None
+        hi=None
+        step=2
+        while lo<last:
+            j=min(i+step, last)
+            result=fit_apart(i, j)
+            if result is None:
+                hi=j
+                break
+            lo=j
+            lo_result=result
+            step*=2
+        if hi is not None:
+            while hi-lo>1:
+                mid=(lo+hi)//2
+                result=fit_apart(i, mid)
+                if result is None:
+                    hi=mid
+                else:
+                    lo=mid
+                    lo_result=result
+        spans.append((lo, lo_result))
+        i=lo
+    return spans
+
+
+def get_curve_values(points, length, cache):
+    """
+    returns the values (P, length-1) of the curves at the frames inside
+    a span of length frames.
+
+    :Parameters:
+      points
+        float (P, 1, 4) control points of the curves in 0..1
+      length
+        frames of the span
+      cache
+        dict of the values by the length for the same points
+    """
+    values=cache.get(length)
+    if values is None:
+        u=numpy.arange(1, length, dtype=numpy.float64)/length
+        values=sampler.evaluate_bezier(points, u[None, :])
+        cache[length]=values
+    return values
+
+
+def reduce_bone_track(track, position_tolerance, rotation_tolerance,
+        curves=PRESET_CURVES, max_span=256, cache=None):
+    """
+    returns the indices of the kept keys and their interpolation
+    blocks uint8 (N, 64).
+
+    :Parameters:
+      track
+        vmd.BoneTrack
+      position_tolerance
+        max error of each position axis
+      rotation_tolerance
+        max rotation error in radians
+      cache
+        dict of the curve values by the span length to share over
+        the tracks of the same curves. None for a new one.
+    """
+    count=len(track)
+    if count<=2:
+        return numpy.arange(count), numpy.array(track.complements)
+    frames=track.frames.astype(numpy.int64)
+    first=frames[0]
+    times=numpy.arange(first, frames[-1]+1)
+    positions, rotations=sampler.BoneSampler(
+            {track.name: track}).sample(times)
+    positions=positions[:, 0]
+    rotations=rotations[:, 0]
+    points=numpy.array(curves, numpy.float64)[:, None, :]/127.0
+    if cache is None:
+        cache={}
+
+    def fit(i, j):
+        a=frames[i]-first
+        b=frames[j]-first
+        # (P, L)
+        y=get_curve_values(points, b-a, cache)
+        # position curves
+        p0=positions[a]
+        p1=positions[b]
+        approx=p0+(p1-p0)*y[..., None]
+        errors=numpy.abs(approx-positions[a+1:b]).max(axis=1)
+        best=errors.argmin(axis=0)
+        if (errors[best, numpy.arange(3)]>position_tolerance).any():
+            return None
+        # rotation curve
+        q=sampler.slerp(rotations[a], rotations[b], y)
+        d=numpy.abs(numpy.sum(q*rotations[a+1:b], axis=-1))
+        angles=2*numpy.arccos(numpy.clip(d, 0.0, 1.0)).max(axis=1)
+        rotation_best=angles.argmin()
+        if angles[rotation_best]>rotation_tolerance:
+            return None
+        return [curves[k] for k in best]+[curves[rotation_best]]
+
+    spans=find_spans(frames, fit, max_span)
+    kept=numpy.array([i for i, _ in spans])
+    complements=numpy.array(track.complements[kept])
+    for n, (i, result) in enumerate(spans):
+        if result:
+            complements[n]=numpy.frombuffer(
+                    vmd.build_bone_complement(result), numpy.uint8)
+    return kept, complements
+
+
+def reduce_morph_track(track, ratio_tolerance, max_span=256):
+    """
+    returns the indices of the kept keys. morphs are interpolated linearly.
+
+    :Parameters:
+      track
+        vmd.MorphTrack
+      ratio_tolerance
+        max error of the ratio
+    """
+    count=len(track)
+    if count<=2:
+        return numpy.arange(count)
+    frames=track.frames.astype(numpy.int64)
+    first=frames[0]
+    ratios=numpy.interp(numpy.arange(first, frames[-1]+1),
+            frames, track.ratios)
+
+    def fit(i, j):
+        a=frames[i]-first
+        b=frames[j]-first
+        u=numpy.arange(1, b-a, dtype=numpy.float64)/(b-a)
+        approx=ratios[a]+(ratios[b]-ratios[a])*u
+        if numpy.abs(approx-ratios[a+1:b]).max()>ratio_tolerance:
+            return None
+        return True
+
+    return numpy.array([i for i, _ in find_spans(frames, fit, max_span)])
+
+
+def reduce_keyframes(motion,
+        position_tolerance=0.01, rotation_tolerance=math.radians(0.5),
+        ratio_tolerance=0.005, curves=PRESET_CURVES, max_span=256):
+    """
+    remove redundant bone and morph keyframes within the tolerances.
+
+    returns a new vmd.Motion in the array mode. cameras, lights and
+    self shadows are copied as they are.
+
+    :Parameters:
+      motion
+        vmd.Motion
+      position_tolerance
+        max error of each bone position axis
+      rotation_tolerance
+        max bone rotation error in radians
+      ratio_tolerance
+        max morph ratio error
+      curves
+        candidate (x1, y1, x2, y2) curves for the removed spans
+      max_span
+        max frames between kept keys
+    """
+    common.require_numpy("reduce_keyframes")
+    result=vmd.Motion()
+    result.model_name=motion.model_name
+
+    frames=vmd.to_frame_array('motions', motion.motions)
+    reduced=[]
+    cache={}
+    for name, rows in vmd.group_frames(frames):
+        track_frames=frames[rows]
+        kept, complements=reduce_bone_track(
+                vmd.BoneTrack(name, track_frames),
+                position_tolerance, rotation_tolerance, curves, max_span,
+                cache)
+        track_frames=track_frames[kept]
+        track_frames['complement']=complements
+        reduced.append(track_frames)
+    result.motions=(numpy.concatenate(reduced) if reduced
+            else frames[:0])
+
+    frames=vmd.to_frame_array('shapes', motion.shapes)
+    reduced=[]
+    for name, rows in vmd.group_frames(frames):
+        track_frames=frames[rows]
+        kept=reduce_morph_track(vmd.MorphTrack(name, track_frames),
+                ratio_tolerance, max_span)
+        reduced.append(track_frames[kept])
+    result.shapes=(numpy.concatenate(reduced) if reduced
+            else frames[:0])
+
+    for name in ['cameras', 'lights', 'self_shadows']:
+        setattr(result, name, vmd.to_frame_array(name, getattr(motion, name)))
+    return result
@@ -0,0 +1,420 @@
+# coding: utf-8
+"""
+vmd bone sampler
+
+evaluate the bezier interpolated bone tracks at arbitrary times
+in batched numpy computation(requires numpy).
+
+the interpolation block of a bone frame has 4 curves for x, y, z and
+rotation. the first 16 bytes are
+x1 of the 4 curves, y1 of the 4 curves, x2 of the 4 curves and
+y2 of the 4 curves in 0..127. the rest are shifted copies of them.
+the curve of a key is used between the previous key and the key.
+"""
+import math
+from .. import common
+from .. import vmd
+try:
+    import numpy
+except ImportError:
+    numpy=None
+
+
+def decode_bone_curves(complements):
+    """
+    decode the interpolation blocks to control points.
+
+    :Parameters:
+      complements
+        uint8 (N, 64)
+
+    returns float64 (N, 4, 4). axis1 is the curve(x, y, z, rotation)
+    and axis2 is (x1, y1, x2, y2) in 0..1.
+    """
+    points=numpy.asarray(complements, numpy.uint8)[:, :16]
+    return points.reshape(-1, 4, 4).transpose(0, 2, 1)/127.0
+
+
+def evaluate_bezier(points, x, iterations=16):
+    """
+    evaluate the cubic bezier curves from (0, 0) to (1, 1).
+
+    solve the curve parameter of x by newton's method falling back to
+    bisection until converged, then return y.
+
+    :Parameters:
+      points
+        (..., 4) control points (x1, y1, x2, y2)
+      x
+        (...) in 0..1
+    """
+    x1, y1, x2, y2, x=numpy.broadcast_arrays(points[..., 0], points[..., 1],
+            points[..., 2], points[..., 3], numpy.clip(x, 0.0, 1.0))
+    # the curves on the diagonal are the straight line
+    curved=(x1!=y1) | (x2!=y2)
+    y=numpy.array(x, numpy.float64)
+    if not curved.any():
+        return y
+    x1=x1[curved]
+    y1=y1[curved]
+    x2=x2[curved]
+    y2=y2[curved]
+    x=x[curved]
+    lo=numpy.zeros(x.shape)
+    hi=numpy.ones(x.shape)
+    s=x.copy()
+    for _ in range(iterations):
+        r=1.0-s
+        f=3*r*r*s*x1+3*r*s*s*x2+s*s*s-x
+        if numpy.abs(f).max()<1e-7:
+            break
+        lo=numpy.where(f<0, s, lo)
+        hi=numpy.where(f<0, hi, s)
+        d=3*r*r*x1+6*r*s*(x2-x1)+3*s*s*(1.0-x2)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            newton=s-f/d
+        s=numpy.where((newton>=lo) & (newton<=hi), newton, (lo+hi)*0.5)
+    r=1.0-s
+    y[curved]=3*r*r*s*y1+3*r*s*s*y2+s*s*s
+    return y
+
+
+def slerp(q0, q1, t):
+    """
+    spherical linear interpolation of (..., 4) quaternions by (...) t.
+    """
+    d=numpy.sum(q0*q1, axis=-1)
+    # the shorter arc
+    q1=numpy.where((d<0)[..., None], -q1, q1)
+    d=numpy.abs(d)
+    theta=numpy.arccos(numpy.clip(d, -1.0, 1.0))
+    sin_theta=numpy.sin(theta)
+    near=sin_theta<1e-6
+    safe=numpy.where(near, 1.0, sin_theta)
+    w0=numpy.where(near, 1.0-t, numpy.sin((1.0-t)*theta)/safe)
+    w1=numpy.where(near, t, numpy.sin(t*theta)/safe)
+    q=w0[..., None]*q0+w1[..., None]*q1
+    return q/numpy.linalg.norm(q, axis=-1)[..., None]
+
+
+class BoneSampler(object):
+    """
+    samples the bones of a motion at times.
+
+    all tracks are flattened into one key array sorted by
+    (bone, frame), so that the keys of every bone at every time are
+    found by one bisection.
+
+    :IVariables:
+        names
+            bone names of the axis B
+    """
+    __slots__=['names', 'keys', 'span', 'starts', 'ends',
+            'positions', 'rotations', 'curves']
+    def __init__(self, motion, names=None):
+        """
+        :Parameters:
+          motion
+            vmd.Motion, vmd.MotionIndex or {bone name: vmd.BoneTrack}
+          names
+            bone names to sample. None for all bones in the motion.
+            bones without keys are sampled as the rest pose.
+        """
+        common.require_numpy("BoneSampler")
+        if isinstance(motion, dict):
+            bones=motion
+        elif isinstance(motion, vmd.MotionIndex):
+            bones=motion.bones
+        else:
+            bones=vmd.MotionIndex(motion).bones
+        if names is None:
+            names=sorted(bones.keys())
+        self.names=list(names)
+        tracks=[bones.get(name) for name in self.names]
+        counts=numpy.array([len(t) if t else 0 for t in tracks], numpy.int64)
+        self.ends=numpy.cumsum(counts)
+        self.starts=self.ends-counts
+        frames=[t.frames.astype(numpy.float64) for t in tracks if t]
+        last=max([f[-1] for f in frames]) if frames else 0.0
+        self.span=last+2.0
+        def concatenate(arrays, shape):
+            arrays=[a for a in arrays if a is not None]
+            if not arrays:
+                return numpy.zeros((0,)+shape)
+            return numpy.concatenate(arrays)
+        self.keys=concatenate([t.frames+i*self.span
+            for i, t in enumerate(tracks) if t], ())
+        self.positions=concatenate(
+                [t.positions.astype(numpy.float64) for t in tracks if t],
+                (3,))
+        rotations=concatenate(
+                [t.rotations.astype(numpy.float64) for t in tracks if t],
+                (4,))
+        norm=numpy.linalg.norm(rotations, axis=-1)
+        self.rotations=rotations/numpy.where(norm>0, norm, 1.0)[:, None]
+        self.curves=concatenate(
+                [decode_bone_curves(t.complements) for t in tracks if t],
+                (4, 4))
+
+    def __str__(self):
+        return '<BoneSampler %d bones, %d keys>' % (
+                len(self.names), len(self.keys))
+
+    def sample(self, times):
+        """
+        evaluate the bones at the frame times.
+
+        :Parameters:
+          times
+            (T,) frame numbers. may be fractional.
+
+        returns translations float64 (T, B, 3) and
+        rotations float64 (T, B, 4) quaternions(x, y, z, w).
+        """
+        times=numpy.asarray(times, numpy.float64).reshape(-1)
+        bones=numpy.arange(len(self.names))
+        T=len(times)
+        B=len(bones)
+        translations=numpy.zeros((T, B, 3))
+        rotations=numpy.zeros((T, B, 4))
+        rotations[..., 3]=1.0
+        has_keys=self.ends>self.starts
+        if not has_keys.any():
+            return translations, rotations
+        keyed=bones[has_keys]
+        starts=self.starts[keyed]
+        lasts=self.ends[keyed]-1
+        offsets=keyed*self.span
+
+        t=times[:, None]
+        next=numpy.searchsorted(self.keys, t+offsets, 'right')
+        prev=numpy.clip(next-1, starts, lasts)
+        next=numpy.clip(next, starts, lasts)
+        t0=self.keys[prev]-offsets
+        t1=self.keys[next]-offsets
+        length=t1-t0
+        u=numpy.where(length>0,
+                (t-t0)/numpy.where(length>0, length, 1.0), 0.0)
+        y=evaluate_bezier(self.curves[next], u[..., None])
+
+        p0=self.positions[prev]
+        p1=self.positions[next]
+        translations[:, has_keys]=p0+(p1-p0)*y[..., :3]
+        rotations[:, has_keys]=slerp(
+                self.rotations[prev], self.rotations[next], y[..., 3])
+        return translations, rotations
+
+
+class MorphSampler(object):
+    """
+    samples the morphs of a motion at times. morphs are interpolated
+    linearly.
+
+    :IVariables:
+        names
+            morph names of the axis M
+    """
+    __slots__=['names', 'keys', 'span', 'starts', 'ends', 'ratios']
+    def __init__(self, motion, names=None):
+        """
+        :Parameters:
+          motion
+            vmd.Motion, vmd.MotionIndex or {morph name: vmd.MorphTrack}
+          names
+            morph names to sample. None for all morphs in the motion.
+            morphs without keys are sampled as 0.
+        """
+        common.require_numpy("MorphSampler")
+        if isinstance(motion, dict):
+            morphs=motion
+        elif isinstance(motion, vmd.MotionIndex):
+            morphs=motion.morphs
+        else:
+            morphs=vmd.MotionIndex(motion).morphs
+        if names is None:
+            names=sorted(morphs.keys())
+        self.names=list(names)
+        tracks=[morphs.get(name) for name in self.names]
+        counts=numpy.array([len(t) if t else 0 for t in tracks], numpy.int64)
+        self.ends=numpy.cumsum(counts)
+        self.starts=self.ends-counts
+        frames=[t.frames.astype(numpy.float64) for t in tracks if t]
+        last=max([f[-1] for f in frames]) if frames else 0.0
+        self.span=last+2.0
+        self.keys=numpy.concatenate([numpy.zeros(0)]+[t.frames+i*self.span
+            for i, t in enumerate(tracks) if t])
+        self.ratios=numpy.concatenate([numpy.zeros(0)]+[
+            t.ratios.astype(numpy.float64) for t in tracks if t])
+
+    def __str__(self):
+        return '<MorphSampler %d morphs, %d keys>' % (
+                len(self.names), len(self.keys))
+
+    def sample(self, times):
+        """
+        evaluate the morphs at the frame times.
+
+        :Parameters:
+          times
+            (T,) frame numbers. may be fractional.
+
+        returns ratios float64 (T, M).
+        """
+        times=numpy.asarray(times, numpy.float64).reshape(-1)
+        morphs=numpy.arange(len(self.names))
+        ratios=numpy.zeros((len(times), len(morphs)))
+        has_keys=self.ends>self.starts
+        if not has_keys.any():
+            return ratios
+        keyed=morphs[has_keys]
+        starts=self.starts[keyed]
+        lasts=self.ends[keyed]-1
+        offsets=keyed*self.span
+
+        t=times[:, None]
+        next=numpy.searchsorted(self.keys, t+offsets, 'right')
+        prev=numpy.clip(next-1, starts, lasts)
+        next=numpy.clip(next, starts, lasts)
+        t0=self.keys[prev]-offsets
+        length=self.keys[next]-offsets-t0
+        u=numpy.where(length>0,
+                (t-t0)/numpy.where(length>0, length, 1.0), 0.0)
+        r0=self.ratios[prev]
+        ratios[:, has_keys]=r0+(self.ratios[next]-r0)*numpy.clip(u, 0.0, 1.0)
+        return ratios
+
+
+class Clip(object):
+    """
+    bone and morph values sampled at a fixed rate.
+
+    :IVariables:
+        times
+            float64 (T,) seconds
+        bone_names
+            bone names of the axis B
+        translations
+            float64 (T, B, 3)
+        rotations
+            float64 (T, B, 4) quaternions(x, y, z, w)
+        morph_names
+            morph names of the axis M
+        ratios
+            float64 (T, M)
+    """
+    __slots__=['times', 'bone_names', 'translations', 'rotations',
+            'morph_names', 'ratios']
+    def __init__(self, times, bone_names, translations, rotations,
+            morph_names, ratios):
+        self.times=times
+        self.bone_names=bone_names
+        self.translations=translations
+        self.rotations=rotations
+        self.morph_names=morph_names
+        self.ratios=ratios
+
+    def __str__(self):
+        return '<Clip %d samples, %d bones, %d morphs>' % (
+                len(self.times), len(self.bone_names), len(self.morph_names))
+
+
+def get_last_frame(index):
+    """
+    returns the last key frame number of the bones and the morphs.
+    """
+    lasts=[t.frames[-1] for t in index.bones.values()]
+    lasts+=[t.frames[-1] for t in index.morphs.values()]
+    return int(max(lasts)) if lasts else 0
+
+
+def resample(motion, fps=30.0, speed=1.0, chunk_size=4096):
+    """
+    sample the bones and the morphs of the motion at a fixed rate
+    for the engines with uniform key rates(requires numpy).
+
+    :Parameters:
+      motion
+        vmd.Motion or vmd.MotionIndex
+      fps
+        samples per second. vmd is 30 frames per second.
+      speed
+        playback speed. 2.0 plays in half time.
+      chunk_size
+        samples evaluated at once
+
+    returns Clip.
+    """
+    common.require_numpy("resample")
+    index=(motion if isinstance(motion, vmd.MotionIndex)
+            else vmd.MotionIndex(motion))
+    duration=get_last_frame(index)/(vmd.FPS*speed)
+    times=numpy.arange(int(math.floor(duration*fps+1e-9))+1)/float(fps)
+    frames=times*(vmd.FPS*speed)
+    bones=BoneSampler(index)
+    morphs=MorphSampler(index)
+    translations=numpy.zeros((len(times), len(bones.names), 3))
+    rotations=numpy.zeros((len(times), len(bones.names), 4))
+    ratios=numpy.zeros((len(times), len(morphs.names)))
+    for begin in range(0, len(times), chunk_size):
+        end=begin+chunk_size
+        translations[begin:end], rotations[begin:end]=bones.sample(
+                frames[begin:end])
+        ratios[begin:end]=morphs.sample(frames[begin:end])
+    return Clip(times, bones.names, translations, rotations,
+            morphs.names, ratios)
+
+
+def bake(motion, step=1, speed=1.0, chunk_size=4096):
+    """
+    bake the bones and the morphs of the motion to keys at every step
+    frames(requires numpy).
+
+    the bone keys are interpolated linearly. the frame numbers of
+    the cameras, lights and self shadows are retimed by the speed.
+
+    :Parameters:
+      motion
+        vmd.Motion
+      step
+        frames between the keys
+      speed
+        playback speed. 2.0 plays in half time.
+      chunk_size
+        frames sampled at once
+
+    returns vmd.Motion in the array mode.
+    """
+    common.require_numpy("bake")
+    index=vmd.MotionIndex(motion)
+    result=vmd.Motion()
+    result.model_name=motion.model_name
+    frames=numpy.arange(0, int(get_last_frame(index)/speed)+1, step)
+
+    bones=BoneSampler(index)
+    keys=numpy.zeros((len(bones.names), len(frames)), vmd.BONE_FRAME_DTYPE)
+    keys['name']=numpy.array(bones.names, 'S15')[:, None]
+    keys['frame']=frames
+    keys['complement']=numpy.frombuffer(vmd.LINEAR_BONE_COMPLEMENT,
+            numpy.uint8)
+    for begin in range(0, len(frames), chunk_size):
+        end=begin+chunk_size
+        translations, rotations=bones.sample(frames[begin:end]*speed)
+        keys['pos'][:, begin:end]=translations.transpose(1, 0, 2)
+        keys['q'][:, begin:end]=rotations.transpose(1, 0, 2)
+    result.motions=keys.reshape(-1)
+
+    morphs=MorphSampler(index)
+    keys=numpy.zeros((len(morphs.names), len(frames)), vmd.MORPH_FRAME_DTYPE)
+    keys['name']=numpy.array(morphs.names, 'S15')[:, None]
+    keys['frame']=frames
+    for begin in range(0, len(frames), chunk_size):
+        end=begin+chunk_size
+        keys['ratio'][:, begin:end]=morphs.sample(frames[begin:end]*speed).T
+    result.shapes=keys.reshape(-1)
+
+    for name in ['cameras', 'lights', 'self_shadows']:
+        keys=vmd.to_frame_array(name, getattr(motion, name)).copy()
+        keys['frame']=numpy.round(keys['frame']/speed)
+        setattr(result, name, vmd.merge_frames(keys,
+            numpy.zeros(len(keys), numpy.int64)))
+    return result
@@ -0,0 +1,63 @@
+# coding: utf-8
+"""
+vmd writer
+"""
+import io
+from .. import common
+from .. import vmd
+try:
+    import numpy
+except ImportError:
+    numpy=None
+
+
+class Writer(common.BufferWriter):
+    """vmd writer
+
+    the whole motion is serialized in memory, then written by flush.
+    """
+    def write_frames(self, name, frames):
+        """
+        write the count and the frames of the section.
+        frames is a list of the frames or a numpy structured array of
+        vmd.FRAME_DTYPES[name] that is copied at once.
+        """
+        self.write_uint(len(frames), 4)
+        if numpy and isinstance(frames, numpy.ndarray):
+            self.write(frames.astype(vmd.FRAME_DTYPES[name],
+                copy=False).tobytes())
+            return
+        s=vmd.FRAME_STRUCTS[name]
+        self.reserve(s.size*len(frames))
+        for frame in frames:
+            self.write_struct(s, *frame.struct_values())
+
+
+def write(ios, motion):
+    """
+    write motion to ios.
+
+    the raw signature, model name and frame name fields read from a file
+    are written as they are, so that a motion is written back byte by
+    byte. other names are written zero padded.
+
+    :Parameters:
+        ios
+            output stream (in io.IOBase)
+        motion
+            vmd.Motion
+
+    >>> import pymeshio.vmd.writer
+    >>> pymeshio.vmd.writer.write(io.open('out.vmd', 'wb'), motion)
+
+    """
+    assert(isinstance(ios, io.IOBase))
+    assert(isinstance(motion, vmd.Motion))
+    writer=Writer(ios)
+    writer.write_bytes(motion.signature, 30)
+    writer.write_bytes(vmd.get_name_field(
+        motion.model_name, motion.raw_model_name), 20)
+    for name in vmd.SECTIONS:
+        writer.write_frames(name, getattr(motion, name))
+    writer.flush()
+    return True
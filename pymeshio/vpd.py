@@ -1,87 +1,197 @@
 # coding: utf-8
-###############################################################################
-# VPD
-###############################################################################
-class LineLoader(object):
+"""
+VPDの読み書き
+
+vpd is a cp932 text of a bone pose::
+
+    Vocaloid Pose Data file
+
+    miku.osm;		// 親ファイル名
+    2;				// 総ポーズボーン数
+
+    Bone0{右親指１
+      0.000000,0.000000,0.000000;				// trans x,y,z
+      0.000000,0.000000,0.000000,1.000000;		// Quaternion x,y,z,w
+    }
+
+the whole text is parsed by the compiled patterns at once.
+"""
+import io
+import os
+import re
+from . import common
+try:
+    import numpy
+except ImportError:
+    numpy=None
+
+
+SIGNATURE=b"Vocaloid Pose Data file"
+MODEL_NAME_COMMENT=u"// 親ファイル名".encode('cp932')
+COUNT_COMMENT=u"// 総ポーズボーン数".encode('cp932')
+# signature, model file name and bone count
+HEADER_PATTERN=re.compile(
+        br'\A\s*Vocaloid Pose Data file\s+([^;\r\n]*);[^\r\n]*\s+(\d+);')
+# name, position and rotation of a bone block
+BONE_PATTERN=re.compile(
+        br'Bone\d+\s*\{([^\r\n]*)\r?\n'
+        br'\s*([^;\r\n]*);[^\r\n]*\r?\n'
+        br'\s*([^;\r\n]*);[^\r\n]*\r?\n'
+        br'\s*\}')
+
+
+class Pose(object):
     """
-    行指向の汎用ローダ
+    bone pose.
+
+    :IVariables:
+        model_name
+            osm file name
+        names
+            bone names
+        positions
+            list of common.Vector3, or float32 (N, 3) in the array mode
+        rotations
+            list of common.Quaternion, or float32 (N, 4) quaternions
+            (x, y, z, w) in the array mode
     """
-    __slots__=['path', 'io', 'end']
+    __slots__=['model_name', 'names', 'positions', 'rotations']
+    def __init__(self, model_name=b''):
+        self.model_name=model_name
+        self.names=[]
+        self.positions=[]
+        self.rotations=[]
+
     def __str__(self):
-        return "<%s current:%d, end:%d>" % (
-                self.__class__, self.getPos(), self.getEnd())
+        return '<VPD "%s" %d bones>' % (self.model_name, len(self.names))
 
-    def getPos(self):
-        return self.io.tell()
+    def __len__(self):
+        return len(self.names)
 
-    def getEnd(self):
-        return self.end
 
-    def readline(self):
-        return (self.io.readline()).strip()
+def parse_floats(fields, size):
+    """
+    parse the comma separated fields of size floats each.
+    """
+    values=[float(v) for v in b','.join(fields).split(b',')] if fields else []
+    if len(values)!=size*len(fields):
+        raise common.ParseException("invalid vector in vpd")
+    return values
 
-    def isEnd(self):
-        return self.io.tell()>=self.end
 
-    def load(self, path, io, end):
-        self.path=path
-        self.io=io
-        self.end=end
-        return self.process()
+def read_from_buffer(buf, array=False, names=None):
+    """
+    read from bytes-like buffer
+
+    :Parameters:
+      buf
+        bytes of the vpd file
+      array
+        numpy arrays for the positions and the rotations(requires numpy).
+      names
+        dict to intern the bone names over files. None for no interning.
+    """
+    if array:
+        common.require_numpy("array mode")
+    text=bytes(buf)
+    header=HEADER_PATTERN.match(text)
+    if not header:
+        raise common.ParseException("invalid vpd header")
+    blocks=BONE_PATTERN.findall(text, header.end())
+    if len(blocks)!=int(header.group(2)):
+        raise common.ParseException("%d bones for the count %s" % (
+            len(blocks), header.group(2)))
+
+    pose=Pose(header.group(1).strip())
+    if names is None:
+        pose.names=[b[0].strip() for b in blocks]
+    else:
+        pose.names=[names.setdefault(b[0].strip(), b[0].strip())
+                for b in blocks]
+    positions=parse_floats([b[1] for b in blocks], 3)
+    rotations=parse_floats([b[2] for b in blocks], 4)
+    if array:
+        pose.positions=numpy.array(positions, numpy.float32).reshape(-1, 3)
+        pose.rotations=numpy.array(rotations, numpy.float32).reshape(-1, 4)
+    else:
+        pose.positions=[common.Vector3(*positions[i:i+3])
+                for i in range(0, len(positions), 3)]
+        pose.rotations=[common.Quaternion(*rotations[i:i+4])
+                for i in range(0, len(rotations), 4)]
+    return pose
+
+
+def read_from_file(path, array=False, names=None):
+    """
+    read from file path
 
-    def process(self):
-        """
-        dummy. read to end.
-        """
-        while not self.isEnd():
-            self.io.readline()
-        return True
+    >>> import pymeshio.vpd
+    >>> p=pymeshio.vpd.read_from_file('resources/pose.vpd')
+    >>> print(p)
 
+    """
+    return read_from_buffer(common.readall(path), array, names)
 
-class VPDLoader(LineLoader):
-    __slots__=['pose']
-    def __init__(self):
-        super(VPDLoader, self).__init__()
-        self.pose=[]
 
-    def __str__(self):
-        return "<VPD poses:%d>" % len(self.pose)
-
-    def process(self):
-        if self.readline()!="Vocaloid Pose Data file":
-            return
-
-        RE_OPEN=re.compile('^(\w+){(.*)')
-        RE_OSM=re.compile('^\w+\.osm;')
-        RE_COUNT=re.compile('^(\d+);')
-
-        bone_count=-1
-        while not self.isEnd():
-            line=self.readline()
-            if line=='':
-                continue
-            m=RE_OPEN.match(line)
-            if m:
-                if not self.parseBone(m.group(2)):
-                    raise Exception("invalid bone")
-                continue
-
-            m=RE_OSM.match(line)
-            if m:
-                continue
-
-            m=RE_COUNT.match(line)
-            if m:
-                bone_count=int(m.group(1))
-                continue
-
-        return len(self.pose)==bone_count
-
-    def parseBone(self, name):
-        bone=MotionData(name)
-        self.pose.append(bone)
-        bone.pos=Vector3(*[float(token) for token in self.readline().split(';')[0].split(',')])
-        bone.q=Quaternion(*[float(token) for token in self.readline().split(';')[0].split(',')])
-        return self.readline()=="}"
+def read(ios, array=False, names=None):
+    assert(isinstance(ios, io.IOBase))
+    return read_from_buffer(ios.read(), array, names)
 
 
+def read_directory(path, array=False, extension='.vpd'):
+    """
+    read all vpd files in the directory.
+    the bone names are interned over the files.
+
+    :Parameters:
+      path
+        directory path
+      array
+        numpy arrays for the positions and the rotations(requires numpy).
+      extension
+        file extension to read(case insensitive)
+
+    returns {file name: Pose} of the files in the name order.
+    """
+    extension=extension.lower()
+    names={}
+    poses={}
+    for name in sorted(os.listdir(path)):
+        if not name.lower().endswith(extension):
+            continue
+        poses[name]=read_from_file(os.path.join(path, name), array, names)
+    return poses
+
+
+def write(ios, pose):
+    """
+    write pose to ios in cp932 text with CRLF.
+
+    :Parameters:
+        ios
+            output stream (in io.IOBase)
+        pose
+            Pose
+    """
+    assert(isinstance(ios, io.IOBase))
+    assert(isinstance(pose, Pose))
+    if numpy and isinstance(pose.positions, numpy.ndarray):
+        positions=pose.positions.tolist()
+        rotations=pose.rotations.tolist()
+    else:
+        positions=[(p.x, p.y, p.z) for p in pose.positions]
+        rotations=[(q.x, q.y, q.z, q.w) for q in pose.rotations]
+    lines=[SIGNATURE, b"",
+            pose.model_name+b";\t\t"+MODEL_NAME_COMMENT,
+            ("%d;\t\t\t\t" % len(pose.names)).encode('ascii')+COUNT_COMMENT,
+            b""]
+    for i, name in enumerate(pose.names):
+        lines.append(("Bone%d{" % i).encode('ascii')+name)
+        lines.append(("  %f,%f,%f;\t\t\t\t// trans x,y,z"
+            % tuple(positions[i])).encode('ascii'))
+        lines.append(("  %f,%f,%f,%f;\t\t// Quaternion x,y,z,w"
+            % tuple(rotations[i])).encode('ascii'))
+        lines.append(b"}")
+        lines.append(b"")
+    ios.write(b"\r\n".join(lines)+b"\r\n")
+    return True
@@ -0,0 +1,71 @@
+# coding: utf-8
+import unittest
+import io
+import struct
+import tempfile
+import os
+import pymeshio.common
+
+
+class TestBufferReader(unittest.TestCase):
+
+    def test_read(self):
+        buf=struct.pack("=bHf3f4sI", -1, 65535, 1.5, 1, 2, 3, b"abcd", 7)
+        reader=pymeshio.common.BufferReader(buf)
+        self.assertEqual(-1, reader.read_int(1))
+        self.assertEqual(65535, reader.read_uint(2))
+        self.assertEqual(1.5, reader.read_float())
+        self.assertEqual((1, 2, 3), reader.read_vector3().to_tuple())
+        self.assertEqual(b"abcd", reader.read_bytes(4))
+        self.assertFalse(reader.is_end())
+        self.assertEqual(7, reader.read_uint(4))
+        self.assertTrue(reader.is_end())
+
+    def test_read_struct(self):
+        s=struct.Struct("<15sI3f")
+        buf=s.pack(b"center", 3, 1, 2, 3)*2
+        reader=pymeshio.common.BufferReader(buf)
+        reader.read_struct(s)
+        name, frame, x, y, z=reader.read_struct(s)
+        self.assertEqual(b"center", pymeshio.common.truncate_zero(name))
+        self.assertEqual((3, 1, 2, 3), (frame, x, y, z))
+        self.assertTrue(reader.is_end())
+
+    def test_eof(self):
+        reader=pymeshio.common.BufferReader(b"ab")
+        self.assertRaises(pymeshio.common.ParseException,
+                reader.read_bytes, 3)
+        self.assertRaises(struct.error, reader.read_uint, 4)
+
+    def test_open_mapped(self):
+        fd, path=tempfile.mkstemp()
+        try:
+            os.write(fd, struct.pack("=I", 12345))
+            os.close(fd)
+            with pymeshio.common.open_mapped(path) as buf:
+                reader=pymeshio.common.BufferReader(buf)
+                self.assertEqual(12345, reader.read_uint(4))
+                reader.release()
+            self.assertTrue(buf.closed)
+        finally:
+            os.remove(path)
+
+
+class TestBufferWriter(unittest.TestCase):
+
+    def test_write(self):
+        ios=io.BytesIO()
+        writer=pymeshio.common.BufferWriter(ios, capacity=4)
+        writer.write_int(-1, 1)
+        writer.write_uint(65535, 2)
+        writer.write_float(1.5)
+        writer.write_vector3(pymeshio.common.Vector3(1, 2, 3))
+        writer.write_bytes(b"abcd", 6)
+        writer.write_uint(7, 4)
+        self.assertEqual(29, writer.size)
+        self.assertEqual(b"", ios.getvalue())
+        writer.flush()
+        self.assertEqual(0, writer.size)
+        self.assertEqual(
+                struct.pack("=bHf3f6sI", -1, 65535, 1.5, 1, 2, 3, b"abcd", 7),
+                ios.getvalue())
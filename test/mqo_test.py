@@ -12,3 +12,121 @@ def test_mqo_read():
     assert 6==len(model.materials)
     assert 1==len(model.objects)
 
+
+MQO_TEXT=b"""Metasequoia Document\r
+Format Text Ver 1.0\r
+\r
+Material 1 {\r
+\t"mat1" shader(3) col(1.000 0.500 0.500 1.000) dif(0.800) tex("a.png")\r
+}\r
+Object "tri" {\r
+\tdepth 1\r
+\tvertex 3 {\r
+\t\t0.0000 0.0000 0.0000\r
+\t\t1.0000 0.0000 0.0000\r
+\t\t0.0000 1.0000 -2.5000\r
+\t}\r
+\tface 2 {\r
+\t\t3 V(0 1 2) M(0) UV(0.00000 0.00000 1.00000 0.00000 0.00000 1.00000) COL(4278190335 4278255360 4294901760)\r
+\t\t2 V(0 1)\r
+\t}\r
+}\r
+Eof\r
+"""
+
+
+def test_mqo_read_buffer():
+    model=pymeshio.mqo.reader.read_from_buffer(MQO_TEXT)
+    assert 1==len(model.materials)
+    assert b"a.png"==model.materials[0].tex
+    obj=model.objects[0]
+    assert b"tri"==obj.name
+    assert 1==obj.depth
+    assert (0, 1, -2.5)==obj.vertices[2].to_tuple()
+    assert 1==len(obj.faces)
+    assert 1==len(obj.edges)
+
+
+def test_mqo_read_array():
+    model=pymeshio.mqo.reader.read_from_buffer(MQO_TEXT, array=True)
+    obj=model.objects[0]
+    assert (3, 3)==obj.vertices.shape
+    assert [0, 1, -2.5]==obj.vertices[2].tolist()
+
+
+def test_mqo_read_face_arrays():
+    model=pymeshio.mqo.reader.read_from_buffer(MQO_TEXT, array=True)
+    faces=model.objects[0].faces
+    assert 2==len(faces)
+    assert [3, 2]==faces.counts.tolist()
+    assert [0, 3, 5]==faces.offsets.tolist()
+    assert [0, 1, 2, 0, 1]==faces.indices.tolist()
+    assert [0, 0]==faces.material_indices.tolist()
+    assert [1, 0]==faces.uvs[1].tolist()
+    assert [255, 0, 0, 255]==faces.colors[0].tolist()
+    assert [255, 255, 255, 255]==faces.colors[4].tolist()
+    face=pymeshio.mqo.reader.read_from_buffer(MQO_TEXT).objects[0].faces[0]
+    assert faces.colors[:3].reshape(-1).tolist()==face.col
+
+
+def test_mqo_read_ngon_arrays():
+    text=MQO_TEXT.replace(b"\t\t2 V(0 1)",
+            b"\t\t5 V(0 1 2 1 0) UV(0 0 1 0 1 1 0 1 0 0)")
+    assert text!=MQO_TEXT
+    faces=pymeshio.mqo.reader.read_from_buffer(text, array=True
+            ).objects[0].faces
+    assert [3, 5]==faces.counts.tolist()
+    assert [0, 3, 8]==faces.offsets.tolist()
+    assert [0, 1, 2, 0, 1, 2, 1, 0]==faces.indices.tolist()
+    assert [0, 1]==faces.uvs[6].tolist()
+
+
+def test_mqo_read_bvertex():
+    import struct
+    data=struct.pack("<6f", 1, 2, 3, 4, 5, 6)
+    text=(b"Metasequoia Document\r\nFormat Text Ver 1.0\r\n"
+            b'Object "b" {\r\n'
+            b"\tBVertex 2 {\r\n\t\tVector 2 [24]\r\n"+data+b"\r\n\t}\r\n"
+            b"\tvertexattr {\r\n\t\tuid {\r\n\t\t\t1\r\n\t\t\t2\r\n\t\t}\r\n\t}\r\n"
+            b"}\r\nEof\r\n")
+    obj=pymeshio.mqo.reader.read_from_buffer(text).objects[0]
+    assert (4, 5, 6)==obj.vertices[1].to_tuple()
+    assert [[1], [2]]==obj.vertex_attributes[b"uid"]
+    obj=pymeshio.mqo.reader.read_from_buffer(text, array=True).objects[0]
+    assert [4, 5, 6]==obj.vertices[1].tolist()
+    assert (2, 1)==obj.vertex_attributes[b"uid"].shape
+
+
+def test_mqo_write():
+    import io
+    import pymeshio.mqo.writer
+    for array in (False, True):
+        model=pymeshio.mqo.reader.read_from_buffer(MQO_TEXT, array)
+        for bvertex_count in (None, 1):
+            out=io.BytesIO()
+            pymeshio.mqo.writer.write(out, model, bvertex_count)
+            assert (b"BVertex" in out.getvalue())==(bvertex_count==1)
+            obj=pymeshio.mqo.reader.read_from_buffer(out.getvalue(), True
+                    ).objects[0]
+            assert 1==obj.depth
+            assert [0, 1, -2.5]==obj.vertices[2].tolist()
+            assert [0, 1, 2, 0, 1]==obj.faces.indices.tolist()
+            assert [255, 0, 0, 255]==obj.faces.colors[0].tolist()
+
+
+def test_mqo_iter_objects():
+    import os
+    import tempfile
+    fd, path=tempfile.mkstemp(suffix=".mqo")
+    try:
+        os.write(fd, MQO_TEXT.replace(b"Eof", MQO_TEXT[MQO_TEXT.index(b"Object"):]))
+        os.close(fd)
+        objects=pymeshio.mqo.reader.iter_objects(path, array=True)
+        assert 1==len(objects.materials)
+        names=[obj.name for obj in objects]
+        assert [b"tri", b"tri"]==names
+        objects=pymeshio.mqo.reader.iter_objects(path)
+        assert b"tri"==next(objects).name
+        objects.close()
+    finally:
+        os.remove(path)
@@ -58,3 +58,48 @@ class TestPmd(unittest.TestCase):
         model.diff(model2)
         self.assertEqual(model, model2)
 
+    def test_serialize(self):
+        model=pymeshio.pmd.Model()
+        model.indices=list(range(300))
+        pymeshio.pmd.writer.serialize(model)
+        model.indices=list(range(600))
+        cached=len(pymeshio.common.STRUCT_CACHE)
+        writer=pymeshio.pmd.writer.serialize(model)
+        self.assertEqual(cached, len(pymeshio.common.STRUCT_CACHE))
+        out=io.BytesIO()
+        pymeshio.pmd.writer.write(out, model)
+        self.assertEqual(writer.size, len(out.getvalue()))
+        model2=pymeshio.pmd.reader.read(io.BytesIO(out.getvalue()))
+        self.assertEqual(model.indices, model2.indices)
+
+    def test_read_array(self):
+        model=pymeshio.pmd.reader.read_from_file(PMD_FILE, array=True)
+        self.assertEqual(pymeshio.pmd.VertexBuffer, model.vertices.__class__)
+        self.assertEqual(12354,  len(model.vertices))
+        self.assertEqual(22961 * 3,  len(model.indices))
+        self.assertEqual(pymeshio.pmd.reader.read_from_file(PMD_FILE), model)
+        # write back
+        out=io.BytesIO()
+        pymeshio.pmd.writer.write(out, model)
+        model2=pymeshio.pmd.reader.read(io.BytesIO(out.getvalue()), array=True)
+        self.assertEqual(model, model2)
+
+    def test_probe(self):
+        probe=pymeshio.pmd.reader.probe(PMD_FILE)
+        self.assertEqual(pymeshio.common.unicode('初音ミク').encode('cp932'),  probe.name)
+        self.assertEqual(12354,  probe.get_count('vertices'))
+        self.assertEqual(22961 * 3,  probe.get_count('indices'))
+        self.assertEqual(17,  probe.get_count('materials'))
+        self.assertEqual(140,  probe.get_count('bones'))
+        self.assertEqual(31,  probe.get_count('morphs'))
+        self.assertEqual(45,  probe.get_count('rigidbodies'))
+        self.assertEqual(27,  probe.get_count('joints'))
+
+    def test_read_sections(self):
+        model=pymeshio.pmd.reader.read_from_file(PMD_FILE)
+        bones=pymeshio.pmd.reader.read_from_file(PMD_FILE,
+                sections={'bones', 'rigidbodies'})
+        self.assertEqual(0,  len(bones.vertices))
+        self.assertEqual(0,  len(bones.morphs))
+        self.assertEqual(model.bones,  bones.bones)
+        self.assertEqual(model.rigidbodies,  bones.rigidbodies)
@@ -3,6 +3,7 @@ import unittest
 import io
 import pymeshio.common
 import pymeshio.pmd.reader
+import pymeshio.pmx
 import pymeshio.pmx.reader
 import pymeshio.pmx.writer
 
@@ -58,3 +59,63 @@ class TestPmx(unittest.TestCase):
         model2=pymeshio.pmx.reader.read(io.BytesIO(out.getvalue()))
         self.assertEqual(model, model2)
 
+    def test_vertex_buffer(self):
+        model=pymeshio.pmx.reader.read_from_file(PMX_FILE)
+        vertices=pymeshio.pmx.VertexBuffer.from_vertices(model.vertices)
+        self.assertEqual(12354,  len(vertices))
+        self.assertEqual((12354, 4),  vertices.bone_indices.shape)
+        self.assertEqual(model.vertices, vertices.to_vertices())
+        # write from the buffer
+        buf=io.BytesIO()
+        pymeshio.pmx.writer.write(buf, model)
+        model.vertices=vertices
+        out=io.BytesIO()
+        pymeshio.pmx.writer.write(out, model)
+        self.assertEqual(buf.getvalue(), out.getvalue())
+
+    def test_read_array(self):
+        model=pymeshio.pmx.reader.read_from_file(PMX_FILE)
+        array_model=pymeshio.pmx.reader.read_from_file(PMX_FILE, array=True)
+        self.assertTrue(
+                isinstance(array_model.vertices, pymeshio.pmx.VertexBuffer))
+        self.assertEqual(
+                pymeshio.pmx.VertexBuffer.from_vertices(model.vertices),
+                array_model.vertices)
+        self.assertEqual(model, array_model)
+
+    def test_probe(self):
+        model=pymeshio.pmx.reader.read_from_file(PMX_FILE)
+        probe=pymeshio.pmx.reader.probe(PMX_FILE)
+        self.assertEqual(model.name,  probe.name)
+        self.assertEqual(model.textures,  probe.textures)
+        for name in pymeshio.pmx.reader.SECTIONS:
+            self.assertEqual(len(getattr(model, name)),  probe.get_count(name))
+
+    def test_read_sections(self):
+        model=pymeshio.pmx.reader.read_from_file(PMX_FILE)
+        bones=pymeshio.pmx.reader.read_from_file(PMX_FILE,
+                sections={'bones', 'rigidbodies'})
+        self.assertEqual(0,  len(bones.vertices))
+        self.assertEqual(0,  len(bones.morphs))
+        self.assertEqual(model.bones,  bones.bones)
+        self.assertEqual(model.rigidbodies,  bones.rigidbodies)
+
+    def test_read_parallel(self):
+        model=pymeshio.pmx.reader.read_from_file(PMX_FILE, array=True)
+        parallel=pymeshio.pmx.reader.read_parallel(PMX_FILE,
+                max_workers=2, chunk_size=4096)
+        self.assertEqual(model, parallel)
+
+    def test_iter_vertices(self):
+        model=pymeshio.pmx.reader.read_from_file(PMX_FILE)
+        self.assertEqual(model.vertices,
+                list(pymeshio.pmx.reader.iter_vertices(PMX_FILE)))
+        chunks=list(pymeshio.pmx.reader.iter_vertices(PMX_FILE, 1000))
+        self.assertEqual(13,  len(chunks))
+        self.assertEqual(
+                pymeshio.pmx.VertexBuffer.from_vertices(model.vertices),
+                pymeshio.pmx.VertexBuffer.concatenate(chunks))
+        offsets=[offset for morph, offset
+                in pymeshio.pmx.reader.iter_morph_offsets(PMX_FILE)]
+        self.assertEqual(sum(len(m.offsets) for m in model.morphs
+            if m.morph_type==1),  len(offsets))
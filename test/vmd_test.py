@@ -0,0 +1,210 @@
+# coding: utf-8
+import io
+import struct
+import unittest
+import pymeshio.common
+import pymeshio.vmd
+import pymeshio.vmd.reader
+import pymeshio.vmd.writer
+
+
+def build_vmd():
+    buf=io.BytesIO()
+    buf.write(struct.pack("=30s20s", b"Vocaloid Motion Data 0002", b"model"))
+    buf.write(struct.pack("=I", 3))
+    for i in range(3):
+        buf.write(pymeshio.vmd.BONE_FRAME_STRUCT.pack(
+            b"center\x00\xfd", i*10, i, 2, 3, 0, 0, 0, 1, bytes(bytearray(range(64)))))
+    buf.write(struct.pack("=I", 1))
+    buf.write(pymeshio.vmd.MORPH_FRAME_STRUCT.pack(b"smile", 5, 0.5))
+    buf.write(struct.pack("=I", 0))
+    buf.write(struct.pack("=I", 0))
+    buf.write(struct.pack("=I", 1))
+    buf.write(pymeshio.vmd.SELF_SHADOW_FRAME_STRUCT.pack(0, 1, 0.5))
+    return buf.getvalue()
+
+
+class TestVmd(unittest.TestCase):
+
+    def test_read(self):
+        motion=pymeshio.vmd.reader.read(io.BytesIO(build_vmd()))
+        self.assertEqual(b"model",  motion.model_name)
+        self.assertEqual(3,  len(motion.motions))
+        self.assertEqual(b"center",  motion.motions[2].name)
+        self.assertEqual(20,  motion.motions[2].frame)
+        self.assertEqual(64,  len(motion.motions[2].complement))
+        self.assertEqual(1,  len(motion.shapes))
+        self.assertEqual(0.5,  motion.shapes[0].ratio)
+
+    def test_read_array(self):
+        motion=pymeshio.vmd.reader.read(io.BytesIO(build_vmd()), array=True)
+        self.assertEqual(pymeshio.vmd.BONE_FRAME_DTYPE,  motion.motions.dtype)
+        self.assertEqual([0, 10, 20],  motion.motions['frame'].tolist())
+        self.assertEqual([2, 2, 3],  motion.motions['pos'][2].tolist())
+        self.assertEqual(b"center",
+                pymeshio.common.truncate_zero(motion.motions['name'][0]))
+        self.assertEqual(0.5,  motion.shapes['ratio'][0])
+        self.assertEqual(0,  len(motion.cameras))
+
+    def test_index(self):
+        for array in (False, True):
+            motion=pymeshio.vmd.reader.read(io.BytesIO(build_vmd()), array=array)
+            index=motion.build_index()
+            self.assertEqual([b"center"],  list(index.bones.keys()))
+            track=index.bones[b"center"]
+            self.assertEqual([0, 10, 20],  track.frames.tolist())
+            self.assertEqual((1, 2),  track.find_keys(15))
+            self.assertEqual((0, 1),  track.find_keys(0))
+            self.assertEqual((2, 2),  track.find_keys(100))
+            self.assertEqual(0.5,  index.morphs[b"smile"].ratios[0])
+            self.assertEqual(0,  len(index.camera))
+            self.assertRaises(ValueError, index.camera.find_keys, 0)
+
+    def test_sampler(self):
+        import numpy
+        import pymeshio.vmd.sampler
+        motion=pymeshio.vmd.reader.read(io.BytesIO(build_vmd()))
+        sampler=pymeshio.vmd.sampler.BoneSampler(motion,
+                [b"center", b"missing"])
+        translations, rotations=sampler.sample([-1, 0, 5, 10, 20, 100])
+        self.assertEqual((6, 2, 3),  translations.shape)
+        self.assertEqual((6, 2, 4),  rotations.shape)
+        self.assertEqual([0, 0, 1, 2, 2],  translations[[0, 1, 3, 4, 5], 0, 0].tolist())
+        self.assertTrue(0<translations[2, 0, 0]<1)
+        self.assertEqual([2, 3],  translations[2, 0, 1:].tolist())
+        self.assertTrue(numpy.allclose(rotations[..., 3], 1))
+        self.assertTrue((translations[:, 1]==0).all())
+
+    def test_bezier(self):
+        import numpy
+        import pymeshio.vmd.sampler
+        x=numpy.linspace(0, 1, 11)
+        linear=numpy.array([20, 20, 107, 107])/127.0
+        self.assertTrue(numpy.allclose(x,
+            pymeshio.vmd.sampler.evaluate_bezier(linear, x)))
+
+    def test_write(self):
+        buf=build_vmd()
+        motion=pymeshio.vmd.reader.read(io.BytesIO(buf), array=True)
+        out=io.BytesIO()
+        pymeshio.vmd.writer.write(out, motion)
+        self.assertEqual(buf,  out.getvalue())
+        # object mode keeps the raw names
+        motion=pymeshio.vmd.reader.read(io.BytesIO(buf))
+        self.assertEqual(1,  len(motion.self_shadows))
+        out=io.BytesIO()
+        pymeshio.vmd.writer.write(out, motion)
+        self.assertEqual(buf,  out.getvalue())
+        motion2=pymeshio.vmd.reader.read(io.BytesIO(out.getvalue()))
+        self.assertEqual([f.name for f in motion.motions],
+                [f.name for f in motion2.motions])
+        self.assertEqual([f.complement for f in motion.motions],
+                [f.complement for f in motion2.motions])
+
+    def test_write_padding(self):
+        buf=build_vmd()
+        # garbage after the zero in the signature and the model name
+        buf=(b"Vocaloid Motion Data 0002\x00\xfd\xfd\xfd\xfd"
+                +b"model\x00\xfd\xfd".ljust(20, b"\xfd")+buf[50:])
+        for array in (False, True):
+            motion=pymeshio.vmd.reader.read(io.BytesIO(buf), array=array)
+            self.assertEqual(b"model",  motion.model_name)
+            out=io.BytesIO()
+            pymeshio.vmd.writer.write(out, motion)
+            self.assertEqual(buf,  out.getvalue())
+        # a renamed frame is zero padded
+        motion=pymeshio.vmd.reader.read(io.BytesIO(buf))
+        motion.motions[0].name=b"arm"
+        motion.model_name=b"other"
+        out=io.BytesIO()
+        pymeshio.vmd.writer.write(out, motion)
+        motion=pymeshio.vmd.reader.read(io.BytesIO(out.getvalue()))
+        self.assertEqual(b"arm\x00".ljust(15, b"\x00"),
+                motion.motions[0].raw_name)
+        self.assertEqual(b"other".ljust(20, b"\x00"),  motion.raw_model_name)
+
+    def test_reduce_keyframes(self):
+        import numpy
+        import pymeshio.vmd.reduction
+        import pymeshio.vmd.sampler
+        motion=pymeshio.vmd.Motion()
+        for i in range(61):
+            frame=pymeshio.vmd.BoneFrame(b"center")
+            frame.frame=i
+            frame.pos=pymeshio.common.Vector3(i*0.1, 0 if i<30 else 1, 0)
+            motion.motions.append(frame)
+        reduced=pymeshio.vmd.reduction.reduce_keyframes(motion)
+        self.assertEqual([0, 29, 30, 60],  reduced.motions['frame'].tolist())
+        times=numpy.arange(0, 61)
+        translations, _=pymeshio.vmd.sampler.BoneSampler(reduced).sample(times)
+        expected, _=pymeshio.vmd.sampler.BoneSampler(motion).sample(times)
+        self.assertTrue(numpy.abs(translations-expected).max()<0.01)
+
+    def test_curve_values(self):
+        import numpy
+        import pymeshio.vmd.reduction
+        import pymeshio.vmd.sampler
+        points=numpy.array(pymeshio.vmd.reduction.PRESET_CURVES,
+                numpy.float64)[:, None, :]/127.0
+        cache={}
+        values=pymeshio.vmd.reduction.get_curve_values(points, 8, cache)
+        self.assertTrue(values is cache[8])
+        self.assertTrue(values is
+                pymeshio.vmd.reduction.get_curve_values(points, 8, cache))
+        expected=pymeshio.vmd.sampler.evaluate_bezier(points,
+                numpy.arange(1, 8)[None, :]/8.0)
+        self.assertTrue(numpy.allclose(expected, values))
+
+    def test_names(self):
+        motion=pymeshio.vmd.reader.read(io.BytesIO(build_vmd()))
+        self.assertEqual([b"center", b"smile"],  motion.names.names)
+        self.assertTrue(motion.motions[0].name is motion.motions[2].name)
+        self.assertEqual(1,  motion.names.get_id(b"smile"))
+        self.assertEqual(u"center",  motion.names.decode(b"center"))
+        motion=pymeshio.vmd.reader.read(io.BytesIO(build_vmd()), array=True)
+        self.assertEqual([0, 0, 0],
+                motion.names.get_ids(motion.motions).tolist())
+        self.assertEqual([b"center"],  motion.names.names)
+
+    def test_merge(self):
+        motion=pymeshio.vmd.reader.read(io.BytesIO(build_vmd()))
+        merged=pymeshio.vmd.merge([motion, motion], offsets=[0, 20])
+        self.assertEqual([0, 10, 20, 30, 40],
+                merged.motions['frame'].tolist())
+        self.assertEqual([5, 25],  merged.shapes['frame'].tolist())
+        self.assertEqual([0, 20],  merged.self_shadows['frame'].tolist())
+        # frame 20 of the first and frame 0 of the second
+        self.assertEqual(0,  merged.motions['pos'][2][0])
+        blended=pymeshio.vmd.merge([motion, motion], offsets=[0, 20],
+                mode='blend')
+        self.assertEqual(1,  blended.motions['pos'][2][0])
+        self.assertRaises(ValueError, pymeshio.vmd.merge, [motion],
+                mode='unknown')
+
+    def test_slice(self):
+        import pymeshio.vmd.sampler
+        motion=pymeshio.vmd.reader.read(io.BytesIO(build_vmd()))
+        cut=pymeshio.vmd.slice(motion, 5, 15)
+        self.assertEqual([0, 5, 10],  cut.motions['frame'].tolist())
+        expected, _=pymeshio.vmd.sampler.BoneSampler(motion).sample([5, 15])
+        self.assertAlmostEqual(expected[0, 0, 0],  cut.motions['pos'][0][0], 5)
+        self.assertAlmostEqual(expected[1, 0, 0],  cut.motions['pos'][2][0], 5)
+        self.assertEqual(1,  cut.motions['pos'][1][0])
+        self.assertEqual([0],  cut.shapes['frame'].tolist())
+        self.assertEqual(0,  len(cut.self_shadows))
+        frames=sorted(reversed(motion.motions))
+        self.assertEqual([0, 10, 20],  [f.frame for f in frames])
+
+    def test_resample(self):
+        import pymeshio.vmd.sampler
+        motion=pymeshio.vmd.reader.read(io.BytesIO(build_vmd()))
+        baked=pymeshio.vmd.sampler.bake(motion, speed=2.0)
+        self.assertEqual(list(range(11)),  baked.motions['frame'].tolist())
+        expected, _=pymeshio.vmd.sampler.BoneSampler(motion).sample([6])
+        self.assertAlmostEqual(expected[0, 0, 0],  baked.motions['pos'][3][0], 5)
+        self.assertEqual(11,  len(baked.shapes))
+        clip=pymeshio.vmd.sampler.resample(motion, fps=60)
+        self.assertEqual(41,  len(clip.times))
+        self.assertEqual((41, 1, 3),  clip.translations.shape)
+        self.assertEqual([b"smile"],  clip.morph_names)
+        self.assertEqual([0.5]*41,  clip.ratios[:, 0].tolist())
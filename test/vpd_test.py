@@ -0,0 +1,72 @@
+# coding: utf-8
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import pymeshio.common
+import pymeshio.vpd
+
+
+VPD_TEXT=(u"""Vocaloid Pose Data file\r
+\r
+miku.osm;\t\t// 親ファイル名\r
+2;\t\t\t\t// 総ポーズボーン数\r
+\r
+Bone0{右親指１\r
+  0.000000,1.000000,-2.500000;\t\t\t\t// trans x,y,z\r
+  0.000000,0.000000,0.000000,1.000000;\t\t// Quaternion x,y,z,w\r
+}\r
+\r
+Bone1{センター\r
+  0.5,0,0;\r
+  0,0.707107,0,0.707107;\r
+}\r
+""").encode('cp932')
+
+
+class TestVpd(unittest.TestCase):
+
+    def test_read(self):
+        pose=pymeshio.vpd.read(io.BytesIO(VPD_TEXT))
+        self.assertEqual(b"miku.osm",  pose.model_name)
+        self.assertEqual(2,  len(pose))
+        self.assertEqual(u"センター".encode('cp932'),  pose.names[1])
+        self.assertEqual((0, 1, -2.5),  pose.positions[0].to_tuple())
+        self.assertEqual(1,  pose.rotations[0].w)
+        pose=pymeshio.vpd.read(io.BytesIO(VPD_TEXT), array=True)
+        self.assertEqual((2, 4),  pose.rotations.shape)
+        self.assertEqual([0.5, 0, 0],  pose.positions[1].tolist())
+
+    def test_invalid(self):
+        self.assertRaises(pymeshio.common.ParseException,
+                pymeshio.vpd.read_from_buffer, b"Vocaloid Motion Data 0002")
+        self.assertRaises(pymeshio.common.ParseException,
+                pymeshio.vpd.read_from_buffer,
+                VPD_TEXT.replace(b"2;", b"3;", 1))
+
+    def test_write(self):
+        pose=pymeshio.vpd.read(io.BytesIO(VPD_TEXT))
+        out=io.BytesIO()
+        pymeshio.vpd.write(out, pose)
+        pose2=pymeshio.vpd.read(io.BytesIO(out.getvalue()), array=True)
+        self.assertEqual(pose.names,  pose2.names)
+        self.assertEqual([0, 1, -2.5],  pose2.positions[0].tolist())
+        out2=io.BytesIO()
+        pymeshio.vpd.write(out2, pose2)
+        self.assertEqual(out.getvalue(),  out2.getvalue())
+
+    def test_read_directory(self):
+        path=tempfile.mkdtemp()
+        try:
+            for name in ["a.vpd", "b.VPD", "c.txt"]:
+                with open(os.path.join(path, name), "wb") as f:
+                    f.write(VPD_TEXT)
+            poses=pymeshio.vpd.read_directory(path)
+            self.assertEqual(["a.vpd", "b.VPD"],  sorted(poses.keys()))
+            self.assertTrue(poses["a.vpd"].names[0] is poses["b.VPD"].names[0])
+            self.assertTrue(isinstance(poses["a.vpd"].positions, list))
+            poses=pymeshio.vpd.read_directory(path, extension=".VPD")
+            self.assertEqual(["a.vpd", "b.VPD"],  sorted(poses.keys()))
+        finally:
+            shutil.rmtree(path)